@@ -1,8 +1,33 @@
+import importlib
 from . import tools
-from .capacity import Capacity
-from .dataset import Dataset
-from .datasource import Datasource
-from .report import Report
-from .tenant import Tenant
-from .token import Token
-from .workspace import Workspace
\ No newline at end of file
+
+# Classes are imported on first use, so that e.g. the CLI or tools-only scripts don't pay for importing every module (and requests)
+_LAZY_IMPORTS = {
+    'Autoscaler': 'autoscaler',
+    'Capacity': 'capacity',
+    'Dataset': 'dataset',
+    'Datasource': 'datasource',
+    'MetadataStore': 'store',
+    'ExportRunner': 'export',
+    'Import': 'imports',
+    'PbixFile': 'pbix',
+    'RefreshScheduler': 'scheduler',
+    'Report': 'report',
+    'Tenant': 'tenant',
+    'Token': 'token',
+    'Workspace': 'workspace'
+}
+
+__all__ = ['tools'] + list(_LAZY_IMPORTS)
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(f'.{_LAZY_IMPORTS[name]}', __name__)
+        value = getattr(module, name)
+        globals()[name] = value # Cache, so this is only called once per name
+        return value
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
@@ -0,0 +1,141 @@
+import re
+import time
+from contextlib import contextmanager
+from .dataset import ACTIVE_REFRESH_STATES
+
+def _sku_key(sku_name):
+    match = re.match(r'([A-Za-z]+)(\d+)$', sku_name)
+    return (match.group(1), int(match.group(2))) if match else (sku_name, 0)
+
+class Autoscaler:
+    """Scales a :class:`~Capacity` up and down in line with the refresh load of the datasets that run on it.
+
+    The capacity is scaled up (and the scale operation waited on) before a refresh wave starts, then scaled back down once all refreshes have finished. Scale-ups happen immediately; scale-downs only once the ``cooldown`` has elapsed since the last change, so short gaps between refreshes don't cause the SKU to flap.
+
+    The SKUs used are those available to the capacity between ``min_sku`` and ``max_sku`` (inclusive), ordered smallest to largest. Each step up the ladder is allowed to carry ``refreshes_per_step`` concurrent refreshes.
+
+    :param capacity: :class:`~Capacity` object to scale
+    :param workspaces: array of :class:`~Workspace` objects whose datasets refresh on this capacity
+    :param min_sku: the SKU to use when idle (e.g. ``A1``)
+    :param max_sku: the largest SKU the capacity may be scaled to (e.g. ``A4``)
+    :param refreshes_per_step: number of queued/running refreshes that warrant one further step up the SKU ladder
+    :param cooldown: minimum seconds since the last scale operation before scaling down
+    :param interval: seconds between checks of refresh load when monitoring
+    :return: :class:`~Autoscaler` object
+
+    .. code-block:: python
+
+        >>> capacity = Capacity(tenant_id, subscription_id, resource_group, 'mycapacity', sp, secret)
+        >>> autoscaler = Autoscaler(capacity, [workspace], min_sku='A1', max_sku='A4')
+
+        >>> with autoscaler.wave(len(workspace.datasets)): # Scale up first, then back down when refreshes have finished
+        ...     workspace.refresh_datasets(wait=False)
+    """
+
+    def __init__(self, capacity, workspaces, min_sku, max_sku, refreshes_per_step=2, cooldown=600, interval=60):
+        self.capacity = capacity
+        self.workspaces = workspaces
+        self.refreshes_per_step = refreshes_per_step
+        self.cooldown = cooldown
+        self.interval = interval
+
+        for sku_name in [min_sku, max_sku]:
+            if sku_name not in capacity.skus:
+                raise SystemExit(f'ERROR: SKU [{sku_name}] is not available for capacity [{capacity.capacity_name}]')
+
+        low, high = _sku_key(min_sku), _sku_key(max_sku)
+        if low[0] != high[0] or low > high:
+            raise SystemExit(f'ERROR: [{min_sku}] to [{max_sku}] is not a valid SKU range')
+
+        self.skus = sorted([s for s in capacity.skus if low <= _sku_key(s) <= high and _sku_key(s)[0] == low[0]], key=_sku_key)
+
+        capacity.get_details() # Find out what we're starting from
+        self.last_scaled = None
+
+    def count_active_refreshes(self):
+        """Count the refreshes that are currently queued or running across all the workspaces.
+
+        :return: number of active refreshes
+        """
+
+        active = 0
+        for workspace in self.workspaces:
+            for dataset in workspace.datasets:
+                if dataset.get_refresh_state() in ACTIVE_REFRESH_STATES:
+                    active += 1
+
+        return active
+
+    def target_sku(self, active_refreshes):
+        """Returns the SKU that should be used for the given number of queued or running refreshes.
+
+        :param active_refreshes: number of refreshes
+        :return: SKU name
+        """
+
+        if active_refreshes <= 0:
+            return self.skus[0]
+
+        step = (active_refreshes - 1) // self.refreshes_per_step + 1 # Any refresh at all warrants the first step up
+        return self.skus[min(step, len(self.skus) - 1)]
+
+    def scale_to(self, sku_name, force=False):
+        """Scale the capacity to the given SKU, waiting for the operation to finish. Scale-downs are skipped if still within the cooldown period.
+
+        :param sku_name: SKU name (must be within the autoscaler's range)
+        :param force: scale down even if still within the cooldown period
+        :return: whether the capacity was scaled
+        """
+
+        current = self.capacity.sku
+        if sku_name == current:
+            return False
+
+        scaling_down = current in self.skus and _sku_key(sku_name) < _sku_key(current)
+        if scaling_down and not force and self.last_scaled and time.monotonic() - self.last_scaled < self.cooldown:
+            return False
+
+        print(f'** Scaling capacity [{self.capacity.capacity_name}] from [{current}] to [{sku_name}]...')
+        self.capacity.change_sku(sku_name, wait=True)
+        self.capacity.sku = sku_name
+        self.last_scaled = time.monotonic()
+
+        return True
+
+    def step(self):
+        """Run one iteration of the control loop: check the refresh load and scale if required.
+        Scales up as soon as the load requires it, but only scales down once no refreshes are active, as changing the SKU interrupts the capacity (and so any refreshes running on it).
+
+        :return: number of active refreshes found
+        """
+
+        active = self.count_active_refreshes()
+        target = self.target_sku(active)
+
+        scaling_down = self.capacity.sku in self.skus and _sku_key(target) < _sku_key(self.capacity.sku)
+        if not (scaling_down and active > 0):
+            self.scale_to(target)
+        return active
+
+    def monitor(self):
+        """Keep scaling the capacity in line with refresh load until all refreshes have finished and the capacity is back at its minimum SKU."""
+
+        while True:
+            active = self.step()
+            if active == 0 and self.capacity.sku == self.skus[0]:
+                break
+
+            time.sleep(self.interval)
+
+    @contextmanager
+    def wave(self, expected_refreshes):
+        """Context manager wrapping a refresh wave. The capacity is scaled up for the expected number of refreshes (waiting for the scale operation to finish) before the body runs, then monitored and scaled back down once the refreshes are done.
+
+        :param expected_refreshes: number of refreshes about to be triggered
+        """
+
+        self.scale_to(self.target_sku(expected_refreshes))
+        try:
+            yield self
+        finally:
+            self.monitor()
@@ -0,0 +1,118 @@
+"""Bulk operations on reports and datasets, run concurrently.
+
+Each function takes a collection of objects and applies the same operation to all of them using a pool of threads. A failure on one object doesn't stop the others: every function returns one result per object (in the order given), so partial failures can be inspected and retried.
+
+.. code-block:: python
+
+    >>> from pbi import bulk
+    >>> results = bulk.repoint(workspace.get_reports(), new_dataset, max_workers=16)
+
+    >>> [r['name'] for r in results if r['status'] == 'Failed']
+    ['Sales Overview']
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests import RequestException
+
+MAX_WORKERS = 8
+RETRIES = 3
+BACKOFF = 5
+
+def _attempt(operation, item, retries, backoff):
+    result = {'item': item, 'name': item.name, 'status': 'Failed', 'result': None, 'error': None}
+
+    for attempt in range(retries + 1):
+        try:
+            result['result'] = operation(item)
+            result['status'] = 'Succeeded'
+            result['error'] = None
+            break
+
+        except (SystemExit, RequestException) as e: # RequestException covers connection resets and timeouts
+            result['error'] = str(e)
+            transient = getattr(e, 'is_transient', False) or isinstance(e, RequestException)
+            if not transient or attempt == retries: # Only retry throttling, service-side and connection errors
+                print(f'!! ERROR. Failed for [{item.name}]. {e}')
+                break
+            time.sleep(backoff * 2 ** attempt)
+
+        except Exception as e: # Recorded rather than raised, so one bad item never loses the results of the others
+            result['error'] = f'{type(e).__name__}: {e}'
+            print(f'!! ERROR. Failed for [{item.name}]. {result["error"]}')
+            break
+
+    return result
+
+def run(operation, items, max_workers=MAX_WORKERS, retries=RETRIES, backoff=BACKOFF):
+    """Apply any operation to a collection of objects concurrently. The other functions in this module are built on this.
+
+    :param operation: a function taking a single object, e.g. ``lambda r: r.clone(f'{r.name} - Copy')``
+    :param items: the objects (e.g. :class:`~Report` or :class:`~Dataset`) to apply it to
+    :param max_workers: maximum number of operations running at once
+    :param retries: number of times to retry an operation that fails due to throttling, a service-side error or a dropped connection
+    :param backoff: seconds to wait before the first retry (doubled for each further retry)
+    :return: array of dictionaries, one per object - ``item``, ``name``, ``status`` (``Succeeded`` or ``Failed``), ``result`` (the value returned by the operation) and ``error``
+    """
+
+    items = list(items)
+    if not items:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(lambda item: _attempt(operation, item, retries, backoff), items))
+
+def delete(items, **kwargs):
+    """Delete reports and/or datasets.
+
+    :param items: the :class:`~Report` and/or :class:`~Dataset` objects to delete
+    :param kwargs: options passed through to :func:`~run`
+    :return: array of results (see :func:`~run`)
+    """
+
+    return run(lambda item: item.delete(), items, **kwargs)
+
+def clone(reports, name_builder, **kwargs):
+    """Copy reports.
+
+    :param reports: the :class:`~Report` objects to copy
+    :param name_builder: a function returning the new name for each report - passing the report object
+    :param kwargs: options passed through to :func:`~run`
+    :return: array of results (see :func:`~run`), where each ``result`` is the new :class:`~Report` object
+    """
+
+    return run(lambda report: report.clone(name_builder(report)), reports, **kwargs)
+
+def rename(reports, name_builder, **kwargs):
+    """Rename reports. As with :meth:`~Report.rename`, each report is copied and the original deleted, so the report GUIDs will change.
+
+    All copies are made first, then the originals of those successfully copied are deleted, so a retried deletion never creates a second copy.
+
+    :param reports: the :class:`~Report` objects to rename
+    :param name_builder: a function returning the new name for each report - passing the report object
+    :param kwargs: options passed through to :func:`~run`
+    :return: array of results (see :func:`~run`), where each ``result`` is the new :class:`~Report` object
+    """
+
+    results = clone(reports, name_builder, **kwargs)
+    copied = [r['item'] for r in results if r['status'] == 'Succeeded']
+    deletions = {id(r['item']): r for r in delete(copied, **kwargs)}
+
+    for result in results:
+        deletion = deletions.get(id(result['item']))
+        if deletion and deletion['status'] == 'Failed':
+            result['status'] = 'Failed'
+            result['error'] = f'Report copied but original not deleted. {deletion["error"]}'
+
+    return results
+
+def repoint(reports, dataset, **kwargs):
+    """Repoint reports to a new model.
+
+    :param reports: the :class:`~Report` objects to repoint
+    :param dataset: the new model
+    :param kwargs: options passed through to :func:`~run`
+    :return: array of results (see :func:`~run`)
+    """
+
+    return run(lambda report: report.repoint(dataset), reports, **kwargs)
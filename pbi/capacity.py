@@ -1,4 +1,5 @@
-import requests
+import time
+from .session import session
 
 from .token import Token
 from .tools import handle_request
@@ -33,15 +34,100 @@ class Capacity:
         :return: Dictionary of SKUs by name
         """
 
-        r = requests.get(f'https://management.azure.com/subscriptions/{self.subscription_id}/resourceGroups/{self.resource_group_name}/providers/Microsoft.PowerBIDedicated/capacities/{self.capacity_name}/skus?api-version=2017-10-01', headers=self.token.get_headers())
+        r = session.get(f'{self._get_url()}/skus?api-version=2017-10-01', headers=self.token.get_headers())
         response = handle_request(r)
         skus = { x['sku']['name'] : x['sku'] for x in response['value'] }
 
         return skus
 
-    def change_sku(self, sku_name):
-        """Update capacity with the given SKU."""
+    def _get_url(self):
+        return f'https://management.azure.com/subscriptions/{self.subscription_id}/resourceGroups/{self.resource_group_name}/providers/Microsoft.PowerBIDedicated/capacities/{self.capacity_name}'
 
-        payload = { 'sku': self.skus.get(sku_name) } # TODO: Handle SKU not found event
-        r = requests.patch(f'https://management.azure.com/subscriptions/{self.subscription_id}/resourceGroups/{self.resource_group_name}/providers/Microsoft.PowerBIDedicated/capacities/{self.capacity_name}?api-version=2017-10-01', json=payload, headers=self.token.get_headers())
-        handle_request(r) # TODO: Handle errors
\ No newline at end of file
+    def get_details(self):
+        """Fetch the current definition of this capacity from Azure, including its SKU and state.
+
+        :return: dictionary of capacity attributes (``sku``, ``properties``, etc.)
+        """
+
+        r = session.get(f'{self._get_url()}?api-version=2017-10-01', headers=self.token.get_headers())
+        json = handle_request(r)
+
+        self.sku = json.get('sku', {}).get('name')
+        return json
+
+    def get_state(self):
+        """Fetch the current state of this capacity (e.g. ``Succeeded``, ``Updating``, ``Scaling``, ``Paused``).
+
+        :return: state string as reported by Azure
+        """
+
+        return self.get_details().get('properties', {}).get('state')
+
+    def change_sku(self, sku_name, wait=False, interval=30, timeout=1800):
+        """Update capacity with the given SKU.
+
+        Azure accepts the request straight away but applies the new SKU in the background. Use ``wait`` to block until the scale operation has finished, so that workloads started afterwards get the new SKU.
+
+        :param sku_name: name of the SKU to apply (must be one of :attr:`skus`, e.g. ``A2``)
+        :param wait: whether to wait for the scale operation to finish before returning
+        :param interval: seconds between state checks when waiting
+        :param timeout: seconds to wait before giving up
+        :return: the final capacity state (if waiting)
+        """
+
+        sku = self.skus.get(sku_name)
+        if sku is None:
+            raise SystemExit(f'ERROR: SKU [{sku_name}] is not available for capacity [{self.capacity_name}]. Options are: {", ".join(self.skus)}')
+
+        payload = { 'sku': sku }
+        r = session.patch(f'{self._get_url()}?api-version=2017-10-01', json=payload, headers=self.token.get_headers())
+        handle_request(r)
+
+        if wait:
+            operation_url = r.headers.get('Azure-AsyncOperation') or r.headers.get('Location') # Returned when Azure applies the change in the background
+            return self.wait_for_state(sku_name, interval=interval, timeout=timeout, operation_url=operation_url)
+
+    def _get_operation_status(self, operation_url):
+        r = session.get(operation_url, headers=self.token.get_headers())
+        json = handle_request(r)
+
+        if r.status_code == 202: # Location URLs return 202 until the operation has finished
+            return 'InProgress'
+        return (json or {}).get('status', 'Succeeded') # Azure-AsyncOperation URLs report a status, Location URLs return the resource once finished
+
+    def wait_for_state(self, sku_name=None, interval=30, timeout=1800, operation_url=None):
+        """Wait until any pending operation on this capacity (e.g. scaling) has finished.
+
+        The capacity state alone can't show that a scale has finished, as Azure may still report ``Succeeded`` for a short while before the operation starts. Pass the expected ``sku_name`` (and, if available, the operation URL returned with the change) to wait for the change itself.
+
+        :param sku_name: the SKU the capacity is expected to have once the operation has finished
+        :param interval: seconds between state checks
+        :param timeout: seconds to wait before giving up
+        :param operation_url: the ``Azure-AsyncOperation`` (or ``Location``) URL returned by Azure for the operation
+        :return: the final capacity state
+        """
+
+        deadline = time.monotonic() + timeout
+
+        while operation_url:
+            status = self._get_operation_status(operation_url)
+            if status == 'Succeeded':
+                break
+            elif status in ['Failed', 'Canceled']:
+                raise SystemExit(f'ERROR: Operation {status.lower()} on capacity [{self.capacity_name}]')
+            elif time.monotonic() > deadline:
+                raise SystemExit(f'ERROR: Timed out waiting for capacity [{self.capacity_name}] (last status: {status})')
+
+            time.sleep(interval)
+
+        while True:
+            details = self.get_details()
+            state = details.get('properties', {}).get('state')
+            if state == 'Succeeded' and sku_name in [None, self.sku]:
+                return state
+            elif state == 'Failed':
+                raise SystemExit(f'ERROR: Operation failed on capacity [{self.capacity_name}]')
+            elif time.monotonic() > deadline:
+                raise SystemExit(f'ERROR: Timed out waiting for capacity [{self.capacity_name}] (last state: {state}, SKU: {self.sku})')
+
+            time.sleep(interval)
@@ -0,0 +1,200 @@
+"""Command line interface, installed as ``pbi-tools``.
+
+Modules that talk to the Power BI service are only imported by the commands that need them, so that offline commands (e.g. ``inspect``) start quickly.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+def _expand(value):
+    """Substitute ``${VAR}`` environment variables throughout the manifest, so that secrets don't need to be stored in it."""
+
+    if isinstance(value, str):
+        return os.path.expandvars(value)
+    elif isinstance(value, list):
+        return [_expand(v) for v in value]
+    elif isinstance(value, dict):
+        return {k: _expand(v) for k, v in value.items()}
+    return value
+
+def load_manifest(filepath):
+    """Load a deployment manifest from a JSON (or, if PyYAML is installed, YAML) file.
+
+    :param filepath: path to the manifest
+    :return: the manifest as a dictionary, with environment variables substituted
+    """
+
+    with open(filepath) as f:
+        if os.path.splitext(filepath)[1].lower() in ['.yml', '.yaml']:
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit('ERROR: PyYAML is required for YAML manifests (pip install pyyaml)')
+            manifest = yaml.safe_load(f)
+        else:
+            manifest = json.load(f)
+
+    return _expand(manifest)
+
+REQUIRED_KEYS = {'deploy': ['dataset'], 'refresh': [], 'sync_permissions': []} # Every action also needs a workspace (or workspace_id)
+
+def _validate_job(job):
+    """Check a job has what its action needs before anything is run, so a mistake in the manifest fails only that job."""
+
+    action = job.get('action')
+    if action not in REQUIRED_KEYS:
+        raise SystemExit(f'ERROR: Unknown action [{action}]. Options are: {", ".join(REQUIRED_KEYS)}')
+
+    missing = [k for k in REQUIRED_KEYS[action] if not job.get(k)]
+    if not (job.get('workspace') or job.get('workspace_id')):
+        missing.append('workspace')
+    if action == 'sync_permissions' and not (job.get('from') or job.get('from_id') or job.get('users')):
+        missing.append('from (or users)')
+    if missing:
+        raise SystemExit(f'ERROR: Job is missing {", ".join(missing)}')
+
+class ManifestRunner:
+    """Runs the jobs described in a manifest in a single process, sharing one token, connection pool and workspace lookups across all of them.
+
+    :param manifest: the manifest as a dictionary (see :func:`~load_manifest`)
+    :return: :class:`~ManifestRunner` object
+
+    An example manifest:
+
+    .. code-block:: json
+
+        {
+            "tenant": {"id": "${TENANT_ID}", "principal": "${PBI_SP}", "secret": "${PBI_SP_SECRET}"},
+            "credentials": {"server.database.windows.net": {"username": "${DB_USER}", "password": "${DB_PASSWORD}"}},
+            "jobs": [
+                {"action": "deploy", "workspace": "Sales", "dataset": "models/Sales.pbix", "reports": ["reports/Overview.pbix"], "params": {"schema": "sales"}},
+                {"action": "refresh", "workspace": "Finance", "wait": true},
+                {"action": "sync_permissions", "workspace": "Finance", "from": "Sales"}
+            ]
+        }
+
+    Workspaces can be given by name (``workspace``) or GUID (``workspace_id``).
+    """
+
+    def __init__(self, manifest):
+        from .tenant import Tenant # Deferred so that offline commands don't import requests
+
+        self.manifest = manifest
+        tenant = manifest.get('tenant', {})
+        self.tenant = Tenant(tenant.get('id'), tenant.get('principal'), tenant.get('secret'))
+        self.credentials = self._build_credentials(manifest.get('credentials'))
+
+    def _build_credentials(self, credentials):
+        from .token import Token
+
+        built = {}
+        for source, cred in (credentials or {}).items():
+            if isinstance(cred.get('token'), dict): # Token definitions are turned into Token objects, which renew themselves
+                t = cred['token']
+                cred = {'token': Token(t.get('url'), t.get('scope'), t.get('principal'), t.get('secret'))}
+            built[source] = cred
+
+        return built
+
+    def get_workspace(self, job, key='workspace'):
+        """Resolve the workspace named in a job. Each job gets a fresh :class:`~Workspace`, so it sees any changes made by earlier jobs."""
+
+        from .workspace import Workspace
+
+        workspace_id = job.get(f'{key}_id')
+        if workspace_id:
+            return Workspace(self.tenant, workspace_id)
+
+        workspace = self.tenant.find_workspace(job.get(key))
+        if workspace is None:
+            raise SystemExit(f'ERROR: Cannot find workspace [{job.get(key)}]')
+        return workspace
+
+    def deploy(self, job):
+        workspace = self.get_workspace(job)
+        workspace.deploy(job['dataset'], job.get('reports', []), dataset_params=job.get('params', {}), credentials=self.credentials, force_refresh=job.get('force_refresh', False), overwrite_reports=job.get('overwrite_reports', False), pipeline=job.get('pipeline', False))
+        return True
+
+    def refresh(self, job):
+        workspace = self.get_workspace(job)
+        result = workspace.refresh_datasets(credentials=self.credentials, wait=job.get('wait', True))
+        return result is not False
+
+    def sync_permissions(self, job):
+        workspace = self.get_workspace(job)
+        if job.get('from') or job.get('from_id'):
+            workspace.copy_permissions(self.get_workspace(job, key='from'))
+        for user in job.get('users', []):
+            workspace.grant_user_access(user)
+        return True
+
+    def run(self, stop_on_error=False):
+        """Run every job in the manifest in order.
+
+        :param stop_on_error: whether to stop at the first failed job, rather than carrying on with the rest
+        :return: a `Boolean` indicating whether all jobs succeeded
+        """
+
+        actions = {'deploy': self.deploy, 'refresh': self.refresh, 'sync_permissions': self.sync_permissions}
+        error = False
+
+        for i, job in enumerate(self.manifest.get('jobs', []), 1):
+            action = job.get('action')
+            target = job.get('workspace') or job.get('workspace_id')
+            print(f'* Job {i}: {action} [{target}]')
+
+            try:
+                _validate_job(job)
+                if not actions[action](job):
+                    raise SystemExit('ERROR: One or more steps failed')
+
+            except (SystemExit, Exception) as e: # Not just SystemExit, so e.g. a missing PBIX file fails only its own job
+                print(f'!! ERROR. Job {i} failed. {e if isinstance(e, SystemExit) else f"{type(e).__name__}: {e}"}')
+                error = True
+                if stop_on_error:
+                    break
+
+        return not error
+
+def _run(args):
+    runner = ManifestRunner(load_manifest(args.manifest))
+    return 0 if runner.run(stop_on_error=args.stop_on_error) else 1
+
+def _inspect(args):
+    from .pbix import PbixFile
+
+    error = False
+    for path in args.paths:
+        if os.path.isdir(path):
+            summaries = PbixFile.scan(path)
+        else:
+            summaries = [PbixFile.summarise(path)]
+
+        for summary in summaries:
+            print(json.dumps(summary, indent=2))
+            error = error or 'error' in summary
+
+    return 1 if error else 0
+
+def main(argv=None):
+    """Entry point for the ``pbi-tools`` command."""
+
+    parser = argparse.ArgumentParser(prog='pbi-tools', description='Power BI deployment and administration tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='run the deploys, refreshes and permission syncs described in a manifest')
+    run_parser.add_argument('manifest', help='path to a JSON (or YAML) manifest')
+    run_parser.add_argument('--stop-on-error', action='store_true', help='stop at the first failed job')
+    run_parser.set_defaults(func=_run)
+
+    inspect_parser = subparsers.add_parser('inspect', help='summarise local PBIX files without publishing them')
+    inspect_parser.add_argument('paths', nargs='+', help='PBIX files or directories to scan')
+    inspect_parser.set_defaults(func=_inspect)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,5 @@
 import json
-import requests
+from .session import session
 from .tools import handle_request
         
 class Datasource:
@@ -56,5 +56,5 @@ class Datasource:
             'useEndUserOAuth2Credentials': 'False' # required to avoid direct query connections 'expiring'
         }}
         
-        r = requests.patch(f'https://api.powerbi.com/v1.0/myorg/gateways/{self.gateway_id}/datasources/{self.id}', headers=self.dataset.workspace.tenant.token.get_headers(), json=payload)
+        r = session.patch(f'https://api.powerbi.com/v1.0/myorg/gateways/{self.gateway_id}/datasources/{self.id}', headers=self.dataset.workspace.tenant.token.get_headers(), json=payload)
         handle_request(r)
\ No newline at end of file
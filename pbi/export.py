@@ -0,0 +1,102 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests import RequestException
+
+class ExportRunner:
+    """Exports many reports (or pages of reports) to file concurrently.
+
+    Power BI limits the number of export jobs that can run at once on each capacity, so at most ``max_concurrent`` jobs are started per capacity at a time. Jobs that fail because of throttling, a service-side error, a dropped connection or a failed export are retried with an increasing delay, up to ``retries`` times.
+
+    :param max_concurrent: limit of concurrent export jobs per capacity
+    :param capacity_limits: a dictionary of capacity GUID to limit, overriding ``max_concurrent`` for specific capacities
+    :param retries: number of times to retry a failed export
+    :param backoff: seconds to wait before the first retry (doubled for each further retry)
+    :param interval: seconds between export status checks
+    :return: :class:`~ExportRunner` object
+
+    .. code-block:: python
+
+        >>> runner = ExportRunner(max_concurrent=5)
+        >>> for report in workspace.get_reports():
+        ...     runner.add(report, f'exports/{report.name}.pdf')
+        >>> results = runner.run()
+
+        >>> [r['filepath'] for r in results if r['status'] == 'Failed']
+        []
+    """
+
+    def __init__(self, max_concurrent=5, capacity_limits=None, retries=3, backoff=30, interval=5):
+        self.max_concurrent = max_concurrent
+        self.capacity_limits = capacity_limits or {}
+        self.retries = retries
+        self.backoff = backoff
+        self.interval = interval
+        self.jobs = []
+
+    def add(self, report, filepath, format='PDF', pages=None, bookmark=None):
+        """Add an export to the run. To render each page to its own file, add the report once per page.
+
+        :param report: :class:`~Report` object to export
+        :param filepath: path to write the file to
+        :param format: the file format (e.g. ``PDF``, ``PPTX``, ``PNG``)
+        :param pages: array of page names to export (defaults to all pages)
+        :param bookmark: name of a bookmark to apply before exporting
+        """
+
+        self.jobs.append({
+            'report': report,
+            'filepath': filepath,
+            'format': format,
+            'pages': pages,
+            'bookmark': bookmark
+        })
+
+    def _export(self, job, semaphore):
+        report = job['report']
+        result = {'report': report.name, 'filepath': job['filepath'], 'status': 'Failed', 'attempts': 0, 'error': None}
+        start = time.monotonic()
+
+        for attempt in range(self.retries + 1):
+            result['attempts'] = attempt + 1
+            try:
+                with semaphore: # Only hold a capacity slot while the export job is running
+                    report.export(job['filepath'], job['format'], job['pages'], job['bookmark'], interval=self.interval)
+                result['status'] = 'Succeeded'
+                result['error'] = None
+                break
+
+            except (SystemExit, RequestException) as e: # RequestException covers connection resets and timeouts
+                result['error'] = str(e)
+                if getattr(e, 'status_code', None) is not None and not e.is_transient: # Don't retry errors such as bad page names
+                    break
+                if attempt < self.retries:
+                    print(f'! WARNING. Export of [{report.name}] failed, retrying. {e}')
+                    time.sleep(self.backoff * 2 ** attempt)
+
+            except Exception as e: # e.g. the file can't be written, which retrying won't fix - recorded so the other exports carry on
+                result['error'] = f'{type(e).__name__}: {e}'
+                break
+
+        if result['status'] == 'Failed':
+            print(f'!! ERROR. Export failed for [{report.name}]. {result["error"]}')
+
+        result['duration'] = time.monotonic() - start
+        return result
+
+    def run(self, max_workers=None):
+        """Run all of the exports, returning once every one has succeeded or run out of retries.
+
+        :param max_workers: number of threads to use (defaults to enough to fill every capacity's limit)
+        :return: array of dictionaries, one per export in the order added - ``report``, ``filepath``, ``status``, ``attempts``, ``error`` and ``duration`` (in seconds)
+        """
+
+        limits = {j['report'].workspace.capacity_id: self.capacity_limits.get(j['report'].workspace.capacity_id, self.max_concurrent) for j in self.jobs}
+        semaphores = {capacity_id: threading.BoundedSemaphore(limit) for capacity_id, limit in limits.items()}
+
+        if not max_workers:
+            max_workers = max(1, sum(limits.values()))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._export, job, semaphores[job['report'].workspace.capacity_id]) for job in self.jobs]
+            return [f.result() for f in futures]
@@ -0,0 +1,114 @@
+import time
+from requests import RequestException
+from .session import session
+from .tools import handle_request, PublishError, RequestError
+
+class Import:
+    """A handle on a PBIX import that has been uploaded to a workspace and may still be publishing. Returned by :meth:`~Workspace.start_import`.
+
+    :param workspace: :class:`~Workspace` object that the file is being imported into
+    :param import_id: the import GUID
+    :param name: the name the file is being published as
+    :return: :class:`~Import` object
+
+    .. code-block:: python
+
+        >>> imports = [workspace.start_import(path, name) for path, name in files]
+        >>> results = wait_for_imports(imports) # One (datasets, reports) tuple per import
+    """
+
+    def __init__(self, workspace, import_id, name=None):
+        self.workspace = workspace
+        self.id = import_id
+        self.name = name
+        self.state = 'Publishing'
+        self._result = None
+        self._error = None
+
+    def poll(self):
+        """Check the import status once (unless it has already finished).
+        A check that fails due to throttling, a service-side error or a dropped connection leaves the import ``Publishing``, to be checked again. Any other failure to check is treated as a failed import.
+
+        :return: the import state - ``Publishing``, ``Succeeded`` or ``Failed``
+        """
+
+        if self.done():
+            return self.state
+
+        try:
+            r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/imports/{self.id}', headers=self.workspace.tenant.token.get_headers())
+            json = handle_request(r)
+        except (RequestError, RequestException) as e:
+            if isinstance(e, RequestError) and not e.is_transient:
+                self.state = 'Failed'
+                self._error = e
+            else:
+                print(f'! WARNING. Could not check import of [{self.name}], will try again. {e}')
+            return self.state
+
+        self.state = json.get('importState')
+
+        if self.state == 'Succeeded':
+            self._result = self._hydrate(json)
+        elif self.state != 'Publishing':
+            error = json.get('error') or {}
+            self._error = PublishError(f'ERROR: Import of [{self.name}] failed. {error.get("code")} ({error.get("details") or error.get("message")})', error.get('code'), error)
+
+        return self.state
+
+    def _hydrate(self, json):
+        from .dataset import Dataset
+        from .report import Report
+
+        datasets = [Dataset(self.workspace, d) for d in json.get('datasets', [])] # Import payload already describes the new objects, so no need to fetch them
+        reports = [Report(self.workspace, r) for r in json.get('reports', [])]
+        return datasets, reports
+
+    def done(self):
+        """Whether the import has finished (successfully or not), as of the last check."""
+        return self.state != 'Publishing'
+
+    def result(self, interval=10, timeout=None):
+        """Wait for the import to finish.
+
+        :param interval: seconds between status checks
+        :param timeout: seconds to wait before giving up (defaults to waiting indefinitely)
+        :return: a tuple of arrays - first of :class:`~Dataset` objects, second of :class:`~Report` objects. These are built from the import status rather than fetched, so are partial: ``Dataset.has_rls`` is ``None`` (unknown) until looked up, e.g. when the dataset is first queried
+        :raises PublishError: if the import failed (or :class:`~tools.RequestError` if its status could not be checked)
+        """
+
+        deadline = time.monotonic() + timeout if timeout else None
+        while self.poll() == 'Publishing':
+            if deadline and time.monotonic() > deadline:
+                raise SystemExit(f'ERROR: Timed out waiting for import of [{self.name}]')
+            time.sleep(interval)
+
+        if self._error:
+            raise self._error
+        return self._result
+
+def wait_for_imports(imports, interval=10, return_exceptions=False):
+    """Wait for several imports to finish, checking on all of them each ``interval``.
+
+    :param imports: array of :class:`~Import` objects
+    :param interval: seconds between rounds of status checks
+    :param return_exceptions: whether to return the error (a :class:`~tools.PublishError` or :class:`~tools.RequestError`) in place of the result of a failed import, rather than raising it
+    :return: array with the ``(datasets, reports)`` tuple for each import, in the order given
+    """
+
+    while True:
+        pending = [i for i in imports if i.poll() == 'Publishing']
+        if not pending:
+            break
+        time.sleep(interval)
+
+    results = []
+    for i in imports:
+        try:
+            results.append(i.result())
+        except (PublishError, RequestError) as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+
+    return results
@@ -0,0 +1,78 @@
+import os
+import json
+import hashlib
+
+class DeployJournal:
+    """A record of the completed steps of a deployment, saved to a local file after each step so that a failed deployment can be resumed. Used by :meth:`~Workspace.deploy`.
+
+    The journal is tied to a ``key`` describing the deployment (e.g. workspace, model file and report files). A journal left by a different deployment is ignored and overwritten.
+
+    :param filepath: path to the journal file (``None`` to keep the journal in memory only)
+    :param key: a string identifying the deployment
+    :return: :class:`~DeployJournal` object
+    """
+
+    def __init__(self, filepath, key=None):
+        self.filepath = filepath
+        self.key = key
+        self.steps = {}
+
+        if filepath and os.path.exists(filepath):
+            with open(filepath) as f:
+                saved = json.load(f)
+
+            if saved.get('key') == key:
+                self.steps = saved.get('steps', {})
+                print(f'** Resuming deployment from journal [{filepath}] ({len(self.steps)} steps completed)')
+            else:
+                print(f'! WARNING. Ignoring journal [{filepath}] as it is for a different deployment')
+
+    @staticmethod
+    def build_key(*components):
+        """Builds a key from any JSON-serialisable values describing the deployment."""
+        return hashlib.sha256(json.dumps(components, default=str).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def hash_file(filepath):
+        """Returns a hash of a file's contents, to tell whether it has changed since a step was recorded."""
+
+        sha = hashlib.sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def __contains__(self, step):
+        return step in self.steps
+
+    def get(self, step):
+        """Returns the data recorded for a completed step (or ``None`` if the step has not been completed)."""
+        return self.steps.get(step)
+
+    def record(self, step, **data):
+        """Mark a step as completed, saving any data needed to resume after it."""
+
+        self.steps[step] = data
+        self._save()
+
+    def discard(self, step):
+        """Mark a step as no longer completed (e.g. because it has been rolled back)."""
+
+        if self.steps.pop(step, None) is not None:
+            self._save()
+
+    def complete(self):
+        """Remove the journal once the deployment has finished, so the next deployment starts afresh."""
+
+        self.steps = {}
+        if self.filepath and os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+    def _save(self):
+        if not self.filepath:
+            return
+
+        temp_filepath = f'{self.filepath}.tmp'
+        with open(temp_filepath, 'w') as f:
+            json.dump({'key': self.key, 'steps': self.steps}, f, indent=2)
+        os.replace(temp_filepath, self.filepath) # Atomic, so a crash mid-write never leaves a corrupt journal
@@ -0,0 +1,255 @@
+import io
+import os
+import re
+import json
+import mmap
+import struct
+import zipfile as zf
+from functools import cached_property
+
+MASHUP_FUNCTIONS = [
+    'Sql.Database', 'Sql.Databases', 'AnalysisServices.Database', 'AnalysisServices.Databases', 'Web.Contents', 'OData.Feed',
+    'Odbc.DataSource', 'Snowflake.Databases', 'PostgreSQL.Database', 'MySQL.Database', 'Oracle.Database', 'SharePoint.Files',
+    'SharePoint.Tables', 'SharePoint.Contents', 'AzureStorage.Blobs', 'AzureStorage.DataLake', 'Excel.Workbook', 'Csv.Document'
+]
+
+_PARAMETER_PATTERN = re.compile(r'shared\s+(#"[^"]+"|[\w.]+)\s*=\s*([^;]+?)\s+meta\s*\[([^\]]*)\]', re.DOTALL)
+_DATASOURCE_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(f) for f in MASHUP_FUNCTIONS) + r')\s*\(\s*"([^"]*)"(?:\s*,\s*"([^"]*)")?')
+
+class _MappedFile(mmap.mmap):
+    """Read-only memory map that can be used as a file by :class:`zipfile.ZipFile` (older versions of ``mmap`` don't report themselves as seekable)."""
+
+    def seekable(self):
+        return True
+
+def _parse_m_value(value):
+    value = value.strip()
+    if value.startswith('"') and value.endswith('"'):
+        return value[1:-1].replace('""', '"')
+    return value
+
+class PbixFile:
+    """An object representing a local PBIX (or PBIT) file, for inspecting it without publishing it.
+
+    The file is memory-mapped and opened as a zip archive on first use, and each part of the file (e.g. ``Connections``, ``Report/Layout``, ``DataModelSchema``) is only read and decoded when the corresponding attribute is first accessed.
+
+    :param filepath: path to the PBIX file
+    :return: :class:`~PbixFile` object
+
+    .. code-block:: python
+
+        >>> with PbixFile('path/to/report.pbix') as pbix:
+        ...     print(pbix.has_embedded_model, pbix.remote_dataset_id, [p['displayName'] for p in pbix.pages])
+        False 6c704d46-667c-475b-a48b-87639182c607 ['Overview', 'Detail']
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.name = os.path.splitext(os.path.basename(filepath))[0]
+        self._file = None
+        self._mmap = None
+        self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _open(self):
+        if self._zip is None:
+            self._file = open(self.filepath, 'rb')
+            try:
+                self._mmap = _MappedFile(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._zip = zf.ZipFile(self._mmap, 'r')
+            except (zf.BadZipFile, ValueError, OSError): # e.g. an empty or corrupt file
+                if self._mmap is not None: self._mmap.close()
+                self._file.close()
+                self._mmap = self._file = None
+                raise
+        return self._zip
+
+    def close(self):
+        """Close the underlying file. Attributes that have already been read remain available."""
+
+        if self._zip is not None:
+            self._zip.close()
+            self._mmap.close()
+            self._file.close()
+            self._zip = self._mmap = self._file = None
+
+    def read(self, member):
+        """Returns the raw contents of a part of the file.
+
+        :param member: the name of the part (e.g. ``Connections``)
+        :return: bytes (or ``None`` if the part does not exist)
+        """
+
+        if member in self.members:
+            return self._open().read(member)
+
+    def _read_json(self, member, encoding):
+        content = self.read(member)
+        if content:
+            return json.loads(content.decode(encoding))
+
+    @cached_property
+    def members(self):
+        """Names of all the parts of the file."""
+        return set(self._open().namelist())
+
+    @property
+    def has_embedded_model(self):
+        """Whether the file contains its own model (rather than connecting to a published dataset)."""
+        return 'DataModel' in self.members or 'DataModelSchema' in self.members
+
+    @cached_property
+    def connection_string(self):
+        """The raw ``Connections`` part, as used by :func:`~tools.rebind_report` (or ``None``)."""
+        return self.read('Connections')
+
+    @cached_property
+    def connections(self):
+        """The decoded ``Connections`` part (or ``None``)."""
+        return self._read_json('Connections', 'utf-8-sig')
+
+    @property
+    def remote_dataset_id(self):
+        """The GUID of the published dataset this file connects to (or ``None``)."""
+
+        for artifact in (self.connections or {}).get('RemoteArtifacts', []):
+            return artifact.get('DatasetId')
+        for connection in (self.connections or {}).get('Connections', []):
+            match = re.search(r'Initial Catalog=([^;]+)', connection.get('ConnectionString', ''))
+            if match:
+                return match.group(1)
+
+    @cached_property
+    def layout(self):
+        """The decoded ``Report/Layout`` part (or ``None``)."""
+        return self._read_json('Report/Layout', 'utf-16-le')
+
+    @property
+    def pages(self):
+        """Array of dictionaries, one per report page in display order, with ``name`` and ``displayName`` keys."""
+
+        sections = sorted((self.layout or {}).get('sections', []), key=lambda s: s.get('ordinal', 0))
+        return [{'name': s.get('name'), 'displayName': s.get('displayName')} for s in sections]
+
+    @cached_property
+    def data_model_schema(self):
+        """The decoded ``DataModelSchema`` part, present in PBIT files (or ``None``)."""
+        return self._read_json('DataModelSchema', 'utf-16-le')
+
+    @cached_property
+    def mashup(self):
+        """The Power Query (M) code of the file's queries, taken from the ``DataMashup`` part (or ``None``)."""
+
+        content = self.read('DataMashup')
+        if content and len(content) > 8:
+            package_length = struct.unpack('<I', content[4:8])[0] # 4 byte version, then the length of the package zip
+            with zf.ZipFile(io.BytesIO(content[8:8 + package_length])) as package:
+                if 'Formulas/Section1.m' in package.namelist():
+                    return package.read('Formulas/Section1.m').decode('utf-8-sig')
+
+    @property
+    def has_queries(self):
+        """Whether the file's Power Query (M) code can be read, which :attr:`parameters` and :attr:`datasources` rely on.
+
+        This is the case for PBIT files and older PBIX files. Current PBIX files keep their queries inside the compressed ``DataModel``, which can't be read here.
+        """
+
+        return bool(self.mashup or self.data_model_schema)
+
+    def _get_expressions(self):
+        if self.mashup:
+            return self.mashup
+
+        model = (self.data_model_schema or {}).get('model', {})
+        expressions = []
+        for e in model.get('expressions', []):
+            expression = e.get('expression')
+            if isinstance(expression, list): expression = '\n'.join(expression)
+            expressions.append(f'shared {e.get("name")} = {expression};')
+        for table in model.get('tables', []):
+            for partition in table.get('partitions', []):
+                expression = partition.get('source', {}).get('expression')
+                if isinstance(expression, list): expression = '\n'.join(expression)
+                if expression: expressions.append(expression)
+
+        return '\n'.join(expressions)
+
+    @cached_property
+    def parameters(self):
+        """A dictionary of model parameter names to their current values.
+
+        Only available for PBIT and older PBIX files, and empty otherwise (see :attr:`has_queries`).
+        """
+
+        parameters = {}
+        for name, value, meta in _PARAMETER_PATTERN.findall(self._get_expressions()):
+            if re.search(r'IsParameterQuery\s*=\s*true', meta):
+                parameters[_parse_m_value(name.lstrip('#'))] = _parse_m_value(value)
+
+        return parameters
+
+    @cached_property
+    def datasources(self):
+        """Array of dictionaries describing the data sources used by the file's queries, each with ``type``, ``path`` and ``database`` keys.
+
+        Only sources with literal (rather than parameterised) arguments can be identified. Only available for PBIT and older PBIX files, and empty otherwise (see :attr:`has_queries`).
+        """
+
+        sources = []
+        for function, path, database in _DATASOURCE_PATTERN.findall(self._get_expressions()):
+            source = {'type': function, 'path': path, 'database': database or None}
+            if source not in sources: sources.append(source)
+
+        return sources
+
+    def summary(self):
+        """Returns the headline details of the file in a single dictionary."""
+
+        return {
+            'filepath': self.filepath,
+            'has_embedded_model': self.has_embedded_model,
+            'remote_dataset_id': self.remote_dataset_id,
+            'pages': [p['displayName'] for p in self.pages],
+            'parameters': self.parameters if self.has_queries else None, # None when they can't be read, rather than an empty result
+            'datasources': self.datasources if self.has_queries else None
+        }
+
+    @classmethod
+    def summarise(cls, filepath):
+        """Open, summarise and close a single file.
+
+        :param filepath: path to the PBIX file
+        :return: dictionary (see :meth:`~summary`), or just ``filepath`` and ``error`` if the file can't be read (e.g. it is empty or corrupt)
+        """
+
+        try:
+            with cls(filepath) as pbix:
+                return pbix.summary()
+        except (zf.BadZipFile, ValueError, OSError) as e:
+            return {'filepath': filepath, 'error': f'{type(e).__name__}: {e}'}
+
+    @classmethod
+    def scan(cls, directory, recursive=True):
+        """Inspect every PBIX/PBIT file in a directory, one at a time, closing each file before moving on to the next.
+
+        :param directory: path to the directory to scan
+        :param recursive: whether to include subdirectories
+        :return: generator of dictionaries (see :meth:`~summarise`) - a file that can't be read doesn't stop the scan
+
+        .. code-block:: python
+
+            >>> embedded = [s['filepath'] for s in PbixFile.scan('reports') if s['has_embedded_model']]
+        """
+
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if os.path.splitext(filename)[1].lower() in ['.pbix', '.pbit']:
+                    yield cls.summarise(os.path.join(root, filename))
+
+            if not recursive:
+                break
@@ -0,0 +1,99 @@
+"""Helpers for sending rows to push datasets, used by :meth:`~Dataset.add_rows`.
+
+Rows are split into request-sized batches and serialised straight to a JSON request body. DataFrames are serialised by pandas itself (``to_json``), which avoids building a dictionary per row, and ``orjson`` is used for other rows if it is installed.
+"""
+
+import json
+import time
+import threading
+from datetime import date, datetime
+
+MAX_ROWS_PER_REQUEST = 10000 # Power BI limit for a single POST rows request
+MAX_REQUESTS_PER_MINUTE = 120 # Power BI limit of POST rows requests per dataset
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'item'): # NumPy scalars
+        return value.item()
+    raise TypeError(f'Cannot serialise {type(value).__name__}')
+
+def dumps(rows):
+    """Serialise an array of row dictionaries into a request body.
+
+    :param rows: array of dictionaries of column name to value
+    :return: JSON request body as bytes
+    """
+
+    if orjson is not None:
+        return b'{"rows":' + orjson.dumps(rows, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY) + b'}'
+    return ('{"rows":' + json.dumps(rows, default=_json_default, separators=(',', ':')) + '}').encode('utf-8')
+
+def iter_payloads(rows, batch_size=MAX_ROWS_PER_REQUEST, columns=None):
+    """Split rows into request bodies of at most ``batch_size`` rows.
+
+    :param rows: a pandas DataFrame, a NumPy structured array, a 2D NumPy array (with ``columns``) or any iterable of row dictionaries
+    :param batch_size: maximum number of rows per request
+    :param columns: column names, required for 2D arrays (or iterables of sequences)
+    :return: generator of ``(row_count, body)`` tuples
+    """
+
+    batch_size = min(batch_size, MAX_ROWS_PER_REQUEST)
+
+    if hasattr(rows, 'to_json') and hasattr(rows, 'iloc'): # pandas DataFrame
+        for start in range(0, len(rows), batch_size):
+            chunk = rows.iloc[start:start + batch_size]
+            yield len(chunk), ('{"rows":' + chunk.to_json(orient='records', date_format='iso') + '}').encode('utf-8')
+        return
+
+    dtype = getattr(rows, 'dtype', None)
+    if dtype is not None and dtype.names: # NumPy structured array
+        columns = list(dtype.names)
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size].tolist() # Converts to native Python types
+            yield len(chunk), dumps([dict(zip(columns, r)) for r in chunk])
+        return
+
+    if dtype is not None: # Plain NumPy array, one row per line
+        if not columns:
+            raise SystemExit('ERROR: Column names are required to add rows from an array')
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size].tolist()
+            yield len(chunk), dumps([dict(zip(columns, r)) for r in chunk])
+        return
+
+    batch = []
+    for row in rows:
+        batch.append(row if isinstance(row, dict) else dict(zip(columns, row)))
+        if len(batch) == batch_size:
+            yield len(batch), dumps(batch)
+            batch = []
+    if batch:
+        yield len(batch), dumps(batch)
+
+class RateLimiter:
+    """Spaces out calls from any number of threads so that no more than ``per_minute`` happen in any minute.
+
+    :param per_minute: maximum number of calls per minute
+    """
+
+    def __init__(self, per_minute=MAX_REQUESTS_PER_MINUTE):
+        self.interval = 60 / per_minute
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        """Block until the next call is allowed."""
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+
+        if start > now:
+            time.sleep(start - now)
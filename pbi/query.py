@@ -0,0 +1,126 @@
+"""Incremental parsing of ``executeQueries`` responses.
+
+The rows of a query result are decoded one at a time as the response streams in, and collected into columns (one list per column) rather than a list of dictionaries per row, so large results don't need to be held in memory as parsed JSON.
+"""
+
+import re
+import json
+import codecs
+
+READ_CHUNK_SIZE = 64 * 1024
+_ROWS_PATTERN = re.compile(r'"rows"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+def iter_rows(chunks):
+    """Decode the rows of a query result from a stream of response chunks.
+
+    :param chunks: iterable of bytes (e.g. ``response.iter_content(READ_CHUNK_SIZE)``)
+    :return: generator of dictionaries, one per row
+    """
+
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    prefix = '' # Everything before the rows, in case the response is an error rather than a result
+    pos = 0
+    in_rows = False
+    found_rows = False
+
+    for chunk in chunks:
+        buffer += text_decoder.decode(chunk)
+
+        while True:
+            if not in_rows:
+                match = _ROWS_PATTERN.search(buffer, pos)
+                if not match:
+                    break
+                prefix += buffer[:match.start()]
+                buffer, pos, in_rows, found_rows = buffer[match.end():], 0, True, True
+
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+
+            if buffer[pos] == ']': # End of this table's rows (look for another table)
+                buffer, pos, in_rows = buffer[pos + 1:], 0, False
+                continue
+
+            try:
+                row, pos = _decoder.raw_decode(buffer, pos)
+            except ValueError: # Row is incomplete, wait for more data
+                break
+            yield row
+
+        if pos > READ_CHUNK_SIZE: # Drop rows already decoded, so the buffer stays small
+            buffer, pos = buffer[pos:], 0
+
+        if not in_rows and len(buffer) > READ_CHUNK_SIZE: # Keep the prefix, but don't search it again
+            prefix += buffer[:-16]
+            buffer = buffer[-16:]
+
+    if in_rows:
+        raise SystemExit('ERROR: Query response ended unexpectedly')
+    if not found_rows:
+        _raise_for_error(prefix + buffer)
+
+def _raise_for_error(text):
+    try:
+        body = json.loads(text) if text.strip() else {}
+    except ValueError:
+        raise SystemExit(f'ERROR: Unexpected query response: {text[:500]}')
+
+    errors = [body.get('error')] + [r.get('error') for r in body.get('results', [])]
+    errors = [e for e in errors if e]
+    if errors:
+        raise SystemExit(f'ERROR: Query failed. {errors[0]}')
+
+def iter_batches(rows, batch_size=10000):
+    """Group rows into columnar batches.
+
+    :param rows: iterable of row dictionaries (see :func:`~iter_rows`)
+    :param batch_size: maximum number of rows per batch
+    :return: generator of dictionaries of column name to list of values
+    """
+
+    columns = None
+    batch = None
+    count = 0
+
+    for row in rows:
+        if columns is None:
+            columns = list(row)
+        if batch is None:
+            batch = {c: [] for c in columns}
+
+        for column in columns:
+            batch[column].append(row.get(column))
+
+        count += 1
+        if count == batch_size:
+            yield batch
+            batch, count = None, 0
+
+    if batch is not None:
+        yield batch
+
+def collect(batches, as_numpy=False):
+    """Combine columnar batches into a single set of columns.
+
+    :param batches: iterable of batches (see :func:`~iter_batches`)
+    :param as_numpy: whether to return each column as a NumPy array (requires NumPy)
+    :return: dictionary of column name to list (or array) of values
+    """
+
+    columns = {}
+    for batch in batches:
+        for column, values in batch.items():
+            columns.setdefault(column, []).extend(values)
+
+    if as_numpy:
+        try:
+            import numpy as np
+        except ImportError:
+            raise SystemExit('ERROR: NumPy is required for as_numpy (pip install numpy)')
+        columns = {c: np.array(v) for c, v in columns.items()}
+
+    return columns
@@ -1,6 +1,9 @@
-import requests
+import time
+from .session import session
 from .tools import handle_request
 
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
 class Report:
     """An object representing a Power BI report.
     You can find the GUID by going to the report and inspecting the URL:
@@ -16,6 +19,7 @@ class Report:
         self.workspace = workspace
         self.id = report['id']
         self.name = report['name']
+        self.dataset_id = report.get('datasetId')
 
     def repoint(self, dataset):
         """Repoint this report to a new model.
@@ -26,9 +30,11 @@ class Report:
         payload = {
             'datasetId': dataset.id
         }
-        r = requests.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/Rebind', headers=self.workspace.tenant.token.get_headers(), json=payload)
+        r = session.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/Rebind', headers=self.workspace.tenant.token.get_headers(), json=payload)
         handle_request(r)
+        self.workspace._invalidate_store()
         self.dataset = dataset
+        self.dataset_id = dataset.id
 
     def clone(self, new_name):
         """Make a copy of this report
@@ -40,8 +46,9 @@ class Report:
         payload = {
             'name': new_name
         }
-        r = requests.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/Clone', headers=self.workspace.tenant.token.get_headers(), json=payload)
+        r = session.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/Clone', headers=self.workspace.tenant.token.get_headers(), json=payload)
         json = handle_request(r)
+        self.workspace._invalidate_store()
 
         return Report(self.workspace, json) # Return new report object
 
@@ -63,11 +70,95 @@ class Report:
     def download(self):
         """Download this report from the workspace to the current working directory."""
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/Export', headers=self.workspace.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/Export', headers=self.workspace.tenant.token.get_headers())
         return r.content
 
+    def start_export(self, format='PDF', pages=None, bookmark=None):
+        """Start an export-to-file job for this report. This is an async call and you will need to check the status separately using :meth:`~get_export_status`.
+
+        Exports require the report to be in a workspace on a Premium or Embedded capacity.
+
+        :param format: the file format (e.g. ``PDF``, ``PPTX``, ``PNG``)
+        :param pages: array of page names to export (defaults to all pages)
+        :param bookmark: name of a bookmark to apply before exporting
+        :return: the export GUID
+        """
+
+        config = {}
+        if pages: config['pages'] = [{'pageName': p} for p in pages]
+        if bookmark: config['defaultBookmark'] = {'name': bookmark}
+
+        payload = {'format': format}
+        if config: payload['powerBIReportConfiguration'] = config
+
+        r = session.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/ExportTo', headers=self.workspace.tenant.token.get_headers(), json=payload)
+        json = handle_request(r)
+
+        return json.get('id')
+
+    def get_export_status(self, export_id):
+        """Check the status of an export job.
+
+        :param export_id: the export GUID returned by :meth:`~start_export`
+        :return: dictionary including ``status`` (``NotStarted``, ``Running``, ``Succeeded`` or ``Failed``) and ``percentComplete``
+        """
+
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/exports/{export_id}', headers=self.workspace.tenant.token.get_headers())
+        json = handle_request(r)
+
+        json['retryAfter'] = int(r.headers.get('Retry-After', 0)) # Service hint as to when to check again
+        return json
+
+    def save_export(self, export_id, filepath):
+        """Stream the file produced by a successful export job to disk.
+
+        :param export_id: the export GUID returned by :meth:`~start_export`
+        :param filepath: path to write the file to
+        :return: the file path
+        """
+
+        with session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}/exports/{export_id}/file', headers=self.workspace.tenant.token.get_headers(), stream=True) as r:
+            handle_request(r)
+            with open(filepath, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=EXPORT_CHUNK_SIZE):
+                    f.write(chunk)
+
+        return filepath
+
+    def export(self, filepath, format='PDF', pages=None, bookmark=None, interval=5, timeout=3600):
+        """Export this report to a file, waiting for the export job to finish. See :meth:`~start_export` for details of the options.
+
+        :param filepath: path to write the file to
+        :param format: the file format (e.g. ``PDF``, ``PPTX``, ``PNG``)
+        :param pages: array of page names to export (defaults to all pages)
+        :param bookmark: name of a bookmark to apply before exporting
+        :param interval: seconds between status checks (unless the service asks for longer)
+        :param timeout: seconds to wait before giving up
+        :return: the file path
+
+        .. code-block:: python
+
+            >>> report = workspace.find_report('Sales')
+            >>> report.export('Sales.pdf', pages=['ReportSection', 'ReportSection2'])
+        """
+
+        export_id = self.start_export(format, pages, bookmark)
+        deadline = time.monotonic() + timeout
+
+        while True:
+            status = self.get_export_status(export_id)
+            if status.get('status') == 'Succeeded':
+                return self.save_export(export_id, filepath)
+            elif status.get('status') == 'Failed':
+                raise SystemExit(f'ERROR: Export failed for [{self.name}]. {status.get("error")}')
+            elif time.monotonic() > deadline:
+                raise SystemExit(f'ERROR: Timed out exporting [{self.name}] ({status.get("percentComplete")}% complete)')
+
+            time.sleep(max(interval, status.get('retryAfter')))
+
     def delete(self):
         """Delete this report from the workspace."""
 
-        r = requests.delete(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}', headers=self.workspace.tenant.token.get_headers())
-        handle_request(r, allowed_codes=[404]) # Don't fail it dataset has already been deleted
\ No newline at end of file
+        r = session.delete(f'https://api.powerbi.com/v1.0/myorg/groups/{self.workspace.id}/reports/{self.id}', headers=self.workspace.tenant.token.get_headers())
+        handle_request(r, allowed_codes=[404]) # Don't fail it dataset has already been deleted
+        self.workspace._invalidate_store()
\ No newline at end of file
@@ -0,0 +1,199 @@
+import time
+from datetime import datetime, timedelta
+from .dataset import ACTIVE_REFRESH_STATES, _parse_time
+
+CLOCK_SKEW = timedelta(seconds=30) # Allowance for the local clock running ahead of the service when matching refreshes by start time
+
+class RefreshScheduler:
+    """Refreshes datasets from any number of workspaces without overloading the capacities they run on.
+
+    Rather than triggering every refresh at once, at most ``max_concurrent`` refreshes run on any one capacity at a time. Datasets are started in priority order (highest first) as soon as a slot frees up and all of their upstream dependencies have refreshed successfully. If a refresh fails, anything downstream of it is skipped.
+
+    :param max_concurrent: default limit of concurrent refreshes per capacity
+    :param capacity_limits: a dictionary of capacity GUID to limit, overriding ``max_concurrent`` for specific capacities
+    :param credentials: a dictionary of credentials used to reauthenticate each dataset before refreshing (see examples in :meth:`~Workspace.refresh_datasets`)
+    :param interval: seconds between checks on running refreshes
+    :return: :class:`~RefreshScheduler` object
+
+    .. code-block:: python
+
+        >>> scheduler = RefreshScheduler(max_concurrent=3)
+        >>> staging = scheduler.add(workspace_a.find_dataset('Staging'), priority=10)
+        >>> sales = scheduler.add(workspace_b.find_dataset('Sales'), depends_on=[staging])
+        >>> results = scheduler.run()
+
+        >>> results[sales.id]
+        {'name': 'Sales', 'workspace': 'Finance', 'status': 'Completed', 'queue_time': 1312.4, 'run_time': 605.2}
+    """
+
+    def __init__(self, max_concurrent=4, capacity_limits=None, credentials=None, interval=30):
+        self.max_concurrent = max_concurrent
+        self.capacity_limits = capacity_limits or {}
+        self.credentials = credentials
+        self.interval = interval
+        self.jobs = {}
+
+    def add(self, dataset, priority=0, depends_on=None):
+        """Add a dataset to the schedule.
+
+        :param dataset: :class:`~Dataset` object to refresh
+        :param priority: datasets with a higher priority are started first (when their dependencies allow)
+        :param depends_on: array of upstream :class:`~Dataset` objects that must refresh successfully before this one starts
+        :return: the dataset, for convenience when chaining dependencies
+        """
+
+        self.jobs[dataset.id] = {
+            'dataset': dataset,
+            'priority': priority,
+            'order': len(self.jobs),
+            'depends_on': [d.id for d in depends_on or []],
+            'status': 'Pending',
+            'refresh_id': None,
+            'triggered_at': None,
+            'queued_at': None,
+            'started_at': None,
+            'finished_at': None
+        }
+        return dataset
+
+    def _get_limit(self, capacity_id):
+        return self.capacity_limits.get(capacity_id, self.max_concurrent)
+
+    def _start(self, job):
+        dataset = job['dataset']
+        job['started_at'] = datetime.now()
+
+        try:
+            latest = (dataset.get_refresh_history(top=1, use_cache=False) or [None])[0]
+            if latest and latest.get('status') in ACTIVE_REFRESH_STATES: # Don't trigger refresh if model is already refreshing, but follow the one in progress
+                print(f'** [{dataset.name}] is already refreshing')
+                job['refresh_id'] = latest.get('requestId')
+                job['triggered_at'] = _parse_time(latest['startTime']) if latest.get('startTime') else datetime.utcnow()
+            else:
+                print(f'** Starting refresh of [{dataset.name}]...')
+                if self.credentials:
+                    dataset.take_ownership()
+                    dataset.authenticate(self.credentials)
+                job['triggered_at'] = datetime.utcnow()
+                job['refresh_id'] = dataset.trigger_refresh()
+
+            job['status'] = 'Running'
+
+        except SystemExit as e:
+            print(f'!! ERROR. Triggering refresh failed for [{dataset.name}]. {e}')
+            self._finish(job, 'Failed')
+
+    def _finish(self, job, status):
+        job['status'] = status
+        job['finished_at'] = datetime.now()
+
+    def _find_refresh(self, job):
+        """The refresh this job is waiting on, from the dataset's recent history (or ``None`` if it isn't listed yet - the history can lag behind a trigger)."""
+
+        history = job['dataset'].get_refresh_history(top=5, use_cache=False)
+        if job['refresh_id']:
+            return next((h for h in history if h.get('requestId') == job['refresh_id']), None)
+
+        started = [h for h in history if h.get('startTime') and _parse_time(h['startTime']) >= job['triggered_at'] - CLOCK_SKEW] # No request id returned, so ignore anything older than the trigger
+        return started[0] if started else None
+
+    def _check(self, job):
+        dataset = job['dataset']
+
+        try:
+            refresh = self._find_refresh(job)
+        except SystemExit as e:
+            print(f'! WARNING. Could not check refresh state for [{dataset.name}]. {e}')
+            return
+
+        state = refresh.get('status') if refresh else None
+        if state is None or state in ACTIVE_REFRESH_STATES:
+            return
+        elif state == 'Completed':
+            print(f'** Refresh complete for [{dataset.name}]')
+            self._finish(job, 'Completed')
+        else:
+            print(f'!! ERROR. Refresh failed for [{dataset.name}]. {refresh.get("serviceExceptionJson") or state}')
+            self._finish(job, 'Failed')
+
+    def _skip_blocked(self):
+        """Skip pending jobs with a failed or skipped upstream dependency, repeating until nothing else changes."""
+
+        changed = True
+        while changed:
+            changed = False
+            for job in self.jobs.values():
+                if job['status'] == 'Pending' and any(self.jobs[d]['status'] in ['Failed', 'Skipped'] for d in job['depends_on']):
+                    print(f'!! Skipping [{job["dataset"].name}] as an upstream refresh failed')
+                    self._finish(job, 'Skipped')
+                    changed = True
+
+    def run(self):
+        """Run the schedule until every dataset has either refreshed, failed or been skipped.
+
+        :return: a dictionary of dataset GUID to results (see :meth:`~get_results`)
+        """
+
+        for job in self.jobs.values():
+            missing = [d for d in job['depends_on'] if d not in self.jobs]
+            if missing:
+                raise SystemExit(f'ERROR: [{job["dataset"].name}] depends on datasets that have not been added to the schedule: {missing}')
+
+            job['queued_at'] = datetime.now()
+
+        while True:
+            for job in [j for j in self.jobs.values() if j['status'] == 'Running']:
+                self._check(job)
+
+            self._skip_blocked()
+
+            running = {}
+            for job in self.jobs.values():
+                if job['status'] == 'Running':
+                    capacity_id = job['dataset'].workspace.capacity_id
+                    running[capacity_id] = running.get(capacity_id, 0) + 1
+
+            attempted = False
+            ready = [j for j in self.jobs.values() if j['status'] == 'Pending' and all(self.jobs[d]['status'] == 'Completed' for d in j['depends_on'])]
+            for job in sorted(ready, key=lambda j: (-j['priority'], j['order'])):
+                capacity_id = job['dataset'].workspace.capacity_id
+                if running.get(capacity_id, 0) < self._get_limit(capacity_id):
+                    attempted = True
+                    self._start(job)
+                    if job['status'] == 'Running':
+                        running[capacity_id] = running.get(capacity_id, 0) + 1
+
+            if not any(j['status'] == 'Running' for j in self.jobs.values()):
+                pending = [j for j in self.jobs.values() if j['status'] == 'Pending']
+                if not pending:
+                    break
+                if not attempted: # Nothing running or startable, so remaining jobs can never start (e.g. circular dependencies)
+                    for job in pending:
+                        print(f'!! Skipping [{job["dataset"].name}] as it cannot be started')
+                        self._finish(job, 'Skipped')
+                    break
+                continue # Anything that failed to start has freed its slot, so try again straight away
+
+            time.sleep(self.interval)
+
+        return self.get_results()
+
+    def get_results(self):
+        """Returns the status and timings of each dataset in the schedule.
+
+        :return: a dictionary of dataset GUID to results - ``name``, ``workspace`` (name), ``status``, ``queue_time`` (seconds waiting for a slot) and ``run_time`` (seconds refreshing). Keyed by GUID, as datasets from different workspaces often share a name
+        """
+
+        results = {}
+        for job in self.jobs.values():
+            queue_end = job['started_at'] or job['finished_at']
+            dataset = job['dataset']
+            results[dataset.id] = {
+                'name': dataset.name,
+                'workspace': getattr(dataset.workspace, 'name', None),
+                'status': job['status'],
+                'queue_time': (queue_end - job['queued_at']).total_seconds() if queue_end and job['queued_at'] else None,
+                'run_time': (job['finished_at'] - job['started_at']).total_seconds() if job['started_at'] and job['finished_at'] else None
+            }
+
+        return results
@@ -0,0 +1,12 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_SIZE = 32 # Enough connections for the threaded helpers (e.g. ExportRunner) to share
+
+def _build_session():
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+    s.mount('https://', adapter)
+    return s
+
+session = _build_session() # Shared by every object in the process, so connections to the service are reused
@@ -0,0 +1,220 @@
+import json
+import time
+import sqlite3
+import threading
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS workspaces (id TEXT PRIMARY KEY, name TEXT, capacity_id TEXT, synced_at REAL);
+CREATE TABLE IF NOT EXISTS datasets (id TEXT PRIMARY KEY, workspace_id TEXT, name TEXT, has_rls INTEGER, synced_at REAL);
+CREATE TABLE IF NOT EXISTS reports (id TEXT PRIMARY KEY, workspace_id TEXT, name TEXT, dataset_id TEXT, synced_at REAL);
+CREATE TABLE IF NOT EXISTS datasources (id TEXT, dataset_id TEXT, gateway_id TEXT, server TEXT, database TEXT, url TEXT, connection_details TEXT, synced_at REAL, PRIMARY KEY (id, dataset_id));
+CREATE TABLE IF NOT EXISTS users (workspace_id TEXT, identifier TEXT, principal_type TEXT, access_right TEXT, synced_at REAL, PRIMARY KEY (workspace_id, identifier));
+CREATE TABLE IF NOT EXISTS refreshes (dataset_id TEXT, start_time TEXT, end_time TEXT, status TEXT, refresh_type TEXT, synced_at REAL, PRIMARY KEY (dataset_id, start_time));
+CREATE TABLE IF NOT EXISTS dataset_syncs (dataset_id TEXT, detail TEXT, synced_at REAL, PRIMARY KEY (dataset_id, detail));
+CREATE INDEX IF NOT EXISTS datasets_workspace ON datasets (workspace_id);
+CREATE INDEX IF NOT EXISTS reports_workspace ON reports (workspace_id);
+CREATE INDEX IF NOT EXISTS reports_dataset ON reports (dataset_id);
+CREATE INDEX IF NOT EXISTS datasources_server ON datasources (server);
+'''
+
+class MetadataStore:
+    """A local SQLite copy of tenant metadata - workspaces, datasets, reports, data sources, users and refresh history.
+
+    Once synced, lookups such as "which datasets use this server" are answered locally, without calling the Power BI service. Passing a store to :class:`~Tenant` also lets workspaces warm-start from it: a workspace synced within ``max_age`` seconds is loaded from the store instead of being fetched again. Publishing to, deleting from or repointing reports in a workspace marks it as out of date, so it is fetched from the service next time.
+
+    :param filepath: path to the SQLite database (created if it doesn't exist)
+    :param max_age: seconds for which synced entries are considered current
+    :return: :class:`~MetadataStore` object
+
+    .. code-block:: python
+
+        >>> store = MetadataStore('pbi.db', max_age=3600)
+        >>> tenant = Tenant(tenant_id, sp, secret, store=store)
+        >>> store.sync_tenant(tenant)
+
+        >>> [d['name'] for d in store.find_datasets_by_server('serverA.database.windows.net')]
+        ['Sales', 'Finance']
+    """
+
+    def __init__(self, filepath, max_age=3600):
+        self.filepath = filepath
+        self.max_age = max_age
+        self.connection = sqlite3.connect(filepath, check_same_thread=False) # Workspaces are invalidated from bulk operation threads
+        self.connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def _query(self, sql, params=()):
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def _is_fresh(self, synced_at, max_age=None):
+        max_age = self.max_age if max_age is None else max_age
+        return synced_at is not None and time.time() - synced_at < max_age
+
+    def save_workspace(self, workspace):
+        """Upsert a workspace, with its datasets and reports. Datasets and reports no longer in the workspace are removed.
+
+        :param workspace: :class:`~Workspace` object
+        """
+
+        now = time.time()
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO workspaces VALUES (?, ?, ?, ?)', (workspace.id, workspace.name, workspace.capacity_id, now))
+
+            self.connection.executemany('INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?)', [(d.id, workspace.id, d.name, None if d.has_rls is None else int(d.has_rls), now) for d in workspace.datasets])
+            self.connection.execute('DELETE FROM datasets WHERE workspace_id = ? AND synced_at < ?', (workspace.id, now))
+
+            self.connection.executemany('INSERT OR REPLACE INTO reports VALUES (?, ?, ?, ?, ?)', [(r.id, workspace.id, r.name, r.dataset_id, now) for r in workspace.reports])
+            self.connection.execute('DELETE FROM reports WHERE workspace_id = ? AND synced_at < ?', (workspace.id, now))
+
+    def invalidate_workspace(self, workspace_id):
+        """Mark a workspace as out of date, so that it is fetched from the service rather than loaded from the store next time. Called when the library changes a workspace's contents (e.g. publishing or deleting).
+
+        :param workspace_id: the workspace GUID
+        """
+
+        with self._lock, self.connection:
+            self.connection.execute('UPDATE workspaces SET synced_at = NULL WHERE id = ?', (workspace_id,))
+
+    def load_workspace(self, workspace, max_age=None):
+        """Populate a workspace's name, datasets and reports from the store, if it was synced recently enough.
+
+        :param workspace: :class:`~Workspace` object (with ``id`` set)
+        :param max_age: seconds for which the entry is considered current (defaults to the store's ``max_age``)
+        :return: whether the workspace was loaded
+        """
+
+        from .dataset import Dataset
+        from .report import Report
+
+        rows = self._query('SELECT * FROM workspaces WHERE id = ?', (workspace.id,))
+        if not rows or not self._is_fresh(rows[0]['synced_at'], max_age):
+            return False
+
+        workspace.name = rows[0]['name']
+        workspace.capacity_id = rows[0]['capacity_id']
+        workspace.datasets = [Dataset(workspace, {'id': d['id'], 'name': d['name'], 'isEffectiveIdentityRequired': None if d['has_rls'] is None else bool(d['has_rls'])}) for d in self._query('SELECT * FROM datasets WHERE workspace_id = ?', (workspace.id,))]
+        workspace.reports = [Report(workspace, {'id': r['id'], 'name': r['name'], 'datasetId': r['dataset_id']}) for r in self._query('SELECT * FROM reports WHERE workspace_id = ?', (workspace.id,))]
+        workspace.from_store = True
+        return True
+
+    def sync_workspace(self, workspace, datasources=True, users=True, refreshes=True, max_age=None):
+        """Sync a workspace and (optionally) the details of its contents. Details of datasets synced within ``max_age`` are not fetched again.
+
+        :param workspace: :class:`~Workspace` object
+        :param datasources: whether to sync the data sources of each dataset
+        :param users: whether to sync the users with access to the workspace
+        :param refreshes: whether to sync the refresh history of each dataset
+        :param max_age: seconds for which dataset details are considered current (defaults to the store's ``max_age``)
+        """
+
+        fresh = getattr(workspace, 'from_store', False) # Loaded from the store because it is current, so don't mark it as newly synced
+        if not fresh:
+            self.save_workspace(workspace)
+        now = time.time()
+
+        if users and not fresh:
+            with self.connection:
+                self.connection.execute('DELETE FROM users WHERE workspace_id = ?', (workspace.id,))
+                self.connection.executemany('INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)', [(workspace.id, u.get('identifier'), u.get('principalType'), u.get('groupUserAccessRight'), now) for u in workspace.get_users_access()])
+
+        for dataset in workspace.datasets:
+            if datasources and not self._is_fresh(self._get_synced_at('datasources', dataset.id), max_age):
+                self._save_datasources(dataset, now)
+            if refreshes and not self._is_fresh(self._get_synced_at('refreshes', dataset.id), max_age):
+                self._save_refreshes(dataset, now)
+
+    def _get_synced_at(self, detail, dataset_id):
+        rows = self._query('SELECT synced_at FROM dataset_syncs WHERE dataset_id = ? AND detail = ?', (dataset_id, detail))
+        return rows[0]['synced_at'] if rows else None
+
+    def _mark_synced(self, detail, dataset_id, now):
+        """Record when a dataset's details were synced - kept separately from the details, as a dataset may have none (e.g. push datasets)."""
+        self.connection.execute('INSERT OR REPLACE INTO dataset_syncs VALUES (?, ?, ?)', (dataset_id, detail, now))
+
+    def _handle_sync_error(self, detail, dataset, now, error):
+        label = {'datasources': 'data sources', 'refreshes': 'refresh history'}[detail]
+        print(f'! WARNING. Could not fetch {label} for [{dataset.name}]. {error}')
+        if not getattr(error, 'is_transient', False): # e.g. push datasets have no bound data sources, which won't change by asking again
+            with self.connection:
+                self._mark_synced(detail, dataset.id, now)
+
+    def _save_datasources(self, dataset, now):
+        try:
+            sources = dataset.get_datasources()
+        except SystemExit as e:
+            self._handle_sync_error('datasources', dataset, now, e)
+            return
+
+        rows = []
+        for source in sources:
+            connection = json.loads(source.connection_details) if isinstance(source.connection_details, str) else (source.connection_details or {})
+            rows.append((source.id, dataset.id, source.gateway_id, connection.get('server'), connection.get('database'), connection.get('url'), json.dumps(connection), now))
+
+        with self.connection:
+            self.connection.execute('DELETE FROM datasources WHERE dataset_id = ?', (dataset.id,))
+            self.connection.executemany('INSERT OR REPLACE INTO datasources VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self._mark_synced('datasources', dataset.id, now)
+
+    def _save_refreshes(self, dataset, now):
+        try:
+            history = dataset.get_refresh_history(use_cache=False)
+        except SystemExit as e:
+            self._handle_sync_error('refreshes', dataset, now, e)
+            return
+
+        with self.connection: # Refreshes are only ever added, so upsert (keeping history Power BI no longer returns)
+            self.connection.executemany('INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?, ?, ?, ?)', [(dataset.id, h.get('startTime'), h.get('endTime'), h.get('status'), h.get('refreshType'), now) for h in history if h.get('startTime')])
+            self._mark_synced('refreshes', dataset.id, now)
+
+    def sync_tenant(self, tenant, **kwargs):
+        """Sync every workspace the tenant has access to (see :meth:`~sync_workspace`).
+
+        :param tenant: :class:`~Tenant` object
+        :param kwargs: options passed through to :meth:`~sync_workspace`
+        """
+
+        for workspace in tenant.get_workspaces():
+            self.sync_workspace(workspace, **kwargs)
+
+    def find_workspace_id(self, name, max_age=None):
+        """Returns the GUID of the workspace with the given name, if it was synced recently enough (or ``None``)."""
+
+        rows = self._query('SELECT id, synced_at FROM workspaces WHERE name = ?', (name,))
+        if rows and self._is_fresh(rows[0]['synced_at'], max_age):
+            return rows[0]['id']
+
+    def find_datasets_by_server(self, server):
+        """Returns the datasets with a data source on the given server (or url domain).
+
+        :param server: the server name, e.g. ``serverA.database.windows.net``
+        :return: array of dictionaries, each with the dataset ``id``, ``name`` and ``workspace_id`` plus the ``database``
+        """
+
+        return self._query('''
+            SELECT DISTINCT d.id, d.name, d.workspace_id, s.database FROM datasets d
+            JOIN datasources s ON s.dataset_id = d.id
+            WHERE s.server = ? OR s.url LIKE ?
+        ''', (server, f'%://{server}%'))
+
+    def find_reports_by_dataset(self, dataset_id):
+        """Returns the reports bound to the given dataset.
+
+        :param dataset_id: the dataset GUID
+        :return: array of dictionaries, each with the report ``id``, ``name`` and ``workspace_id``
+        """
+
+        return self._query('SELECT id, name, workspace_id FROM reports WHERE dataset_id = ?', (dataset_id,))
+
+    def get_refresh_history(self, dataset_id):
+        """Returns the stored refresh history of the given dataset, most recent first.
+
+        :param dataset_id: the dataset GUID
+        :return: array of dictionaries, each with ``start_time``, ``end_time``, ``status`` and ``refresh_type``
+        """
+
+        return self._query('SELECT start_time, end_time, status, refresh_type FROM refreshes WHERE dataset_id = ? ORDER BY start_time DESC', (dataset_id,))
@@ -1,4 +1,4 @@
-import requests
+from .session import session
 
 from .token import Token
 from .workspace import Workspace
@@ -10,13 +10,16 @@ class Tenant:
     :param id: the Azure tenant GUID
     :param principal: service principal GUID
     :param secret: associated secret value to authenticate the service principal
+    :param store: a :class:`~MetadataStore` to warm-start workspaces from (optional)
     :return: :class:`~Tenant` object
     """
 
-    def __init__(self, id, sp, secret):
+    def __init__(self, id, sp, secret, store=None):
         pbi_oauth_url = f'https://login.microsoftonline.com/{id}/oauth2/v2.0/token'
         scope = 'https://analysis.windows.net/powerbi/api/.default'
         self.token = Token(pbi_oauth_url, scope, sp, secret)
+        self._workspace_ids = {}
+        self.store = store
 
     def _get_headers(self):
         return {'Authorization': f'Bearer {self.token.get_token()}'}
@@ -27,23 +30,38 @@ class Tenant:
         :return: Array of :class:`~Workspace` objects
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups', headers=self._get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups', headers=self._get_headers())
         json = handle_request(r)
 
         self.workspaces = [Workspace(self, w.get('id')) for w in json.get('value')]
         return self.workspaces
 
-    def find_workspace(self, workspace_name):
+    def find_workspace(self, workspace_name, use_cache=True):
         """Tries to fetch the workspace with the given name.
+        The GUIDs of workspaces found are cached, so repeated lookups of the same workspace (e.g. the 'Deployment Aid' workspace across many deployments) don't need to search for it again. A new :class:`~Workspace` object (with its own, current list of datasets and reports) is returned each time.
 
-        :param workspace__name: the workspace GUID
+        :param workspace_name: the workspace name
+        :param use_cache: whether to use a previously found GUID rather than searching for the workspace again
         :return: a :class:`~Workspace` object (or ``None``)
         """
 
-        workspaces = self.get_workspaces()
-        for workspace in workspaces:
-            if workspace.name == workspace_name:
-                return Workspace(self, workspace.id)
+        workspace_id = None
+        if use_cache:
+            workspace_id = self._workspace_ids.get(workspace_name)
+            if workspace_id is None and self.store:
+                workspace_id = self.store.find_workspace_id(workspace_name)
+
+        if workspace_id is None:
+            name_filter = workspace_name.replace("'", "''") # Escape quotes for OData
+            r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups', params={'$filter': f"name eq '{name_filter}'"}, headers=self._get_headers())
+            json = handle_request(r)
+
+            workspace_id = next((w.get('id') for w in json.get('value') if w.get('name') == workspace_name), None)
+            if workspace_id is None:
+                return None
+
+        self._workspace_ids[workspace_name] = workspace_id
+        return Workspace(self, workspace_id)
 
     def create_workspace(self, name):
         """Creates a new workspace.
@@ -54,7 +72,7 @@ class Tenant:
         """
 
         payload = {"name": name}
-        r = requests.post(f'https://api.powerbi.com/v1.0/myorg/groups', headers=self._get_headers(), json=payload)
+        r = session.post(f'https://api.powerbi.com/v1.0/myorg/groups', headers=self._get_headers(), json=payload)
         json = handle_request(r)
         workspace = Workspace(self, json.get('id'))
 
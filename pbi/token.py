@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-import requests
+from .session import session
 from .tools import handle_request
         
 class Token:
@@ -30,7 +30,7 @@ class Token:
             'client_id': self.principal,
             'client_secret': self.secret
         }
-        r = requests.post(self.url, payload)
+        r = session.post(self.url, payload)
         handle_request(r)
 
         self.__token = r.json()['access_token']
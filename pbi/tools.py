@@ -1,6 +1,37 @@
 import os
 import zipfile as zf
 
+TRANSIENT_CODES = [429, 500, 502, 503, 504] # Throttling and service-side errors, which are worth retrying
+
+class RequestError(SystemExit):
+    """Raised when a request to the Power BI service fails. Subclasses ``SystemExit`` so existing error handling continues to work.
+
+    :param message: error message
+    :param status_code: the HTTP status code of the failed request
+    """
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def is_transient(self):
+        """Whether the failure was due to throttling or a temporary service-side error."""
+        return self.status_code in TRANSIENT_CODES
+
+class PublishError(SystemExit):
+    """Raised when the Power BI service fails to import a PBIX file. Subclasses ``SystemExit`` so existing error handling continues to work.
+
+    :param message: error message
+    :param code: the error code returned by the service (e.g. ``PackageNotValid``)
+    :param details: the full error returned by the service
+    """
+
+    def __init__(self, message, code=None, details=None):
+        super().__init__(message)
+        self.code = code
+        self.details = details
+
 def handle_request(r, allowed_codes=None):
     if not allowed_codes: allowed_codes = [] # Default to empty list
 
@@ -10,7 +41,7 @@ def handle_request(r, allowed_codes=None):
         if r.status_code in allowed_codes:
             print(f'WARNING: {message}')
         else:
-            raise SystemExit(f'ERROR {message}')
+            raise RequestError(f'ERROR {message}', r.status_code)
 
     return r.json() if r.content else None
 
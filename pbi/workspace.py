@@ -1,10 +1,17 @@
-import time
-import requests
+import os
+import re
+import csv
+import base64
+from .session import session
 from os import path
 
+from . import bulk
 from .report import Report
 from .dataset import Dataset
-from .tools import handle_request, get_connection_string, rebind_report
+from .pbix import PbixFile
+from .imports import Import, wait_for_imports
+from .journal import DeployJournal
+from .tools import handle_request, get_connection_string, rebind_report, RequestError
 
 AID_WORKSPACE_NAME = 'Deployment Aid'
 AID_REPORT_NAME = 'Deployment Aid Report'
@@ -14,8 +21,27 @@ def _name_builder(filepath, **kwargs):
     filename = path.basename(filepath)
     return path.splitext(filename)[0] # Get file stem (i.e. no extension)
 
-def _name_comparator(a, b, **kwargs):
+def _name_comparator(a, b, *args, **kwargs):
     return a == b
+
+def _check_files(dataset_filepath, report_filepaths, dataset_params=None):
+    """Inspect the files to be deployed locally, so that problems are found before anything is published."""
+
+    with PbixFile(dataset_filepath) as pbix:
+        if not pbix.has_embedded_model:
+            raise SystemExit(f'ERROR: [{dataset_filepath}] does not contain a model')
+
+        if dataset_params and not pbix.has_queries: # Current PBIX files keep their queries inside the compressed model
+            print(f'! WARNING. Cannot verify parameters against [{dataset_filepath}], as its queries cannot be read locally')
+        elif dataset_params:
+            unknown_params = [k for k in dataset_params if k not in pbix.parameters]
+            if unknown_params:
+                print(f'! WARNING. Parameters not defined in [{dataset_filepath}] will be ignored: {unknown_params}')
+
+    for filepath in report_filepaths:
+        with PbixFile(filepath) as pbix:
+            if pbix.has_embedded_model: # rebind_report only works for reports connected to a remote model
+                raise SystemExit(f'ERROR: [{filepath}] has an embedded model so cannot be rebound')
         
 class Workspace:
     """An object representing a Power BI workspace. You can find the GUID by going to the workspace and inspecting the URL:
@@ -32,18 +58,30 @@ class Workspace:
     def __init__(self, tenant, id):
         self.id = id
         self.tenant = tenant
-        
+
+        store = getattr(tenant, 'store', None)
+        if store and store.load_workspace(self): # Warm start from local metadata, if current
+            return
+
         self._get_name()
         self.get_datasets()
         self.get_reports()
+        if store: store.save_workspace(self)
 
     def _get_name(self):
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups?$filter=contains(id,\'{self.id}\')', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups?$filter=contains(id,\'{self.id}\')', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         self.name = json.get('value')[0]['name']
+        self.capacity_id = json.get('value')[0].get('capacityId') # Not set for shared capacity
         return self.name
 
+    def _invalidate_store(self):
+        """Called after changing the contents of this workspace, so that it isn't warm-started from out of date metadata."""
+
+        store = getattr(self.tenant, 'store', None)
+        if store: store.invalidate_workspace(self.id)
+
     def get_users_access(self):
         """Fetches a fresh list of users with access to this workspace.
         Includes both human and service principals.
@@ -51,7 +89,7 @@ class Workspace:
         :return: array of dictonaries, each representing a user
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/users', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/users', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         self.users = json.get('value')
@@ -64,7 +102,7 @@ class Workspace:
 
         identifiers = [u.get('identifier') for u in self.get_users_access()] # list of emails/principal GUIDs
         method = 'put' if user_access.get('identifier') in identifiers else 'post' # put/post based on whether user already exists
-        r = requests.request(method, f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/users', headers=self.tenant.token.get_headers(), json=user_access)
+        r = session.request(method, f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/users', headers=self.tenant.token.get_headers(), json=user_access)
         handle_request(r)
 
     def copy_permissions(self, reference_workspace):
@@ -82,7 +120,7 @@ class Workspace:
         :return: array of :class:`~Dataset` objects
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         self.datasets = [Dataset(self, d) for d in json.get('value')]
@@ -97,7 +135,7 @@ class Workspace:
         :return: a :class:`~Dataset` object
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets/{dataset_id}', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets/{dataset_id}', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         return Dataset(self, json)
@@ -111,20 +149,46 @@ class Workspace:
         :return: a :class:`~Dataset` object (or ``None``)
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         for r in json.get('value'):
             if r.get('name') == dataset_name:
                 return Dataset(self, r)
 
+    def create_push_dataset(self, name, tables, retention_policy='None'):
+        """Creates a push dataset, to which rows can be added using :meth:`~Dataset.add_rows`.
+
+        :param name: the dataset name
+        :param tables: a dictionary of table name to a dictionary of column name to data type (``Int64``, ``Double``, ``Boolean``, ``Datetime``, ``String`` or ``Decimal``)
+        :param retention_policy: ``None`` or ``basicFIFO`` (keep the latest 200,000 rows per table)
+        :return: a :class:`~Dataset` object
+
+        .. code-block:: python
+
+            >>> dataset = workspace.create_push_dataset('Metrics', {'Readings': {'time': 'Datetime', 'sensor': 'String', 'value': 'Double'}})
+        """
+
+        payload = {
+            'name': name,
+            'defaultMode': 'Push',
+            'tables': [{'name': t, 'columns': [{'name': k, 'dataType': v} for k, v in columns.items()]} for t, columns in tables.items()]
+        }
+        r = session.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/datasets', params={'defaultRetentionPolicy': retention_policy}, headers=self.tenant.token.get_headers(), json=payload)
+        json = handle_request(r)
+        self._invalidate_store()
+
+        dataset = Dataset(self, {'isEffectiveIdentityRequired': False, **json}) # Push datasets can't use row-level security
+        self.datasets.append(dataset)
+        return dataset
+
     def get_reports(self):
         """Fetches a fresh list of reports from the PBI service.
 
         :return: array of :class:`~Report` objects
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/reports', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/reports', headers=self.tenant.token.get_headers())
         handle_request(r)
 
         reports = r.json()['value']
@@ -140,7 +204,7 @@ class Workspace:
         :return: a :class:`~Report` object
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/reports/{report_id}', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/reports/{report_id}', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         return Report(self, json)
@@ -154,54 +218,46 @@ class Workspace:
         :return: a :class:`~Report` object (or ``None``)
         """
 
-        r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/reports', headers=self.tenant.token.get_headers())
+        r = session.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/reports', headers=self.tenant.token.get_headers())
         json = handle_request(r)
 
         for r in json.get('value'):
             if r.get('name') == report_name:
                 return Report(self, r)
 
-    def publish_file(self, filepath, name, skipReports=False, overwrite_reports=False):
-        """Publishes the given PBIX file to the workspace.
+    def start_import(self, filepath, name, skipReports=False, overwrite_reports=False):
+        """Uploads the given PBIX file to the workspace, returning as soon as the upload has finished rather than waiting for the file to publish.
         If a model/report already exists with the same name, the new model/report is published alongside it.
 
         :param filepath: absolute *or* relative path to the PBIX file which is to be published
         :param name: desired name for the model/report
         :param skipReports: whether to supress the publishing of reports (i.e. publish only the model)
-        :return: a tuple of arrays - first of :class:`~Dataset` objects, second of :class:`~Report` objects
+        :return: an :class:`~Import` handle, to check on or wait for the import (see also :func:`~imports.wait_for_imports`)
         """
 
         nameConflict = 'CreateOrOverwrite' if overwrite_reports else 'Ignore'
         params = {'datasetDisplayName': name + '.pbix', 'nameConflict': nameConflict}
         if skipReports: params['skipReport'] = 'true'
 
-        payload = {}
         with open(filepath, 'rb') as f:
-            payload['file'] = open(filepath, 'rb')
-
-        r = requests.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/imports', params=params, headers=self.tenant.token.get_headers(), files=payload)
+            r = session.post(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/imports', params=params, headers=self.tenant.token.get_headers(), files={'file': f})
         json = handle_request(r)
-        import_id = json.get('id')
+        self._invalidate_store()
 
-        # Check whether import has finished, wait and retry if not
-        while True:
-            r = requests.get(f'https://api.powerbi.com/v1.0/myorg/groups/{self.id}/imports/{import_id}', headers=self.tenant.token.get_headers())
-            json = handle_request(r)
-            import_status = json.get('importState')
+        return Import(self, json.get('id'), name)
 
-            if import_status == 'Succeeded':
-                datasets = [self.get_dataset(d.get('id')) for d in json.get('datasets')]
-                reports =  [self.get_report(r.get('id')) for r in json.get('reports')]
-
-                return datasets, reports
+    def publish_file(self, filepath, name, skipReports=False, overwrite_reports=False):
+        """Publishes the given PBIX file to the workspace, waiting for it to finish publishing (see :meth:`~start_import` to avoid waiting).
+        If a model/report already exists with the same name, the new model/report is published alongside it.
 
-            elif import_status == 'Publishing':
-                time.sleep(10)
-                continue
+        :param filepath: absolute *or* relative path to the PBIX file which is to be published
+        :param name: desired name for the model/report
+        :param skipReports: whether to supress the publishing of reports (i.e. publish only the model)
+        :return: a tuple of arrays - first of :class:`~Dataset` objects, second of :class:`~Report` objects (partial, see :meth:`~Import.result`)
+        :raises ~tools.PublishError: if the import fails
+        """
 
-            else:
-                print(f'Import ERROR: {json.get("error").get("code")} ({json.get("error").get("message")})')
-                break
+        return self.start_import(filepath, name, skipReports, overwrite_reports).result()
 
     def refresh_datasets(self, credentials=None, wait=True):
         """Refreshes all datasets in the workspace, optionally reauthenticating using the credentials provided. Currently, only database credentials are supported using either SQL logins or oauth tokens.
@@ -262,7 +318,31 @@ class Workspace:
 
             return not error
 
-    def deploy(self, dataset_filepath, report_filepaths, dataset_params=None, credentials=None, force_refresh=False, on_report_success=None, name_builder=_name_builder, name_comparator=_name_comparator, overwrite_reports=False, **kwargs):
+    def get_refresh_stats(self, use_cache=True):
+        """Summarises the refresh history of every dataset in the workspace (see :meth:`~Dataset.get_refresh_stats`).
+
+        :param use_cache: whether to use previously fetched refresh histories
+        :return: dictionary of dataset GUID to refresh statistics (keyed by GUID, as datasets may share a name, e.g. during a deployment)
+        """
+
+        return {d.id: d.get_refresh_stats(use_cache=use_cache) for d in self.datasets}
+
+    def export_refresh_stats(self, filepath, use_cache=True):
+        """Writes the refresh statistics of every dataset in the workspace to a CSV file, one row per dataset.
+
+        :param filepath: path to the CSV file
+        :param use_cache: whether to use previously fetched refresh histories
+        """
+
+        stats = self.get_refresh_stats(use_cache=use_cache)
+        names = {d.id: d.name for d in self.datasets}
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['workspace', 'dataset', 'dataset_id', 'count', 'failure_rate', 'median', 'p95', 'mean', 'last', 'trend'])
+            for id, s in stats.items():
+                writer.writerow([self.name, names.get(id), id] + [s[k] for k in ['count', 'failure_rate', 'median', 'p95', 'mean', 'last', 'trend']])
+
+    def deploy(self, dataset_filepath, report_filepaths, dataset_params=None, credentials=None, force_refresh=False, on_report_success=None, name_builder=_name_builder, name_comparator=_name_comparator, overwrite_reports=False, pipeline=False, journal_path=None, **kwargs):
         """Publishes a single model and an collection of associated reports. Note, currently only database authentication is supported, using either SQL logins or oauth tokens.
 
         There is a requirement for a dummy report called 'Deployment Aid Report' to exist either in the publishing workspace (default) or in a separate 'config' workspace.
@@ -277,6 +357,8 @@ class Workspace:
         :param on_report_success: a function that is called after each report is successfully published - passing the report object and ``**kwargs``
         :param name_builder: a function that returns the desired model/report name - passing the report object and ``**kwargs``
         :param config_workspace: a separate workspace in which to look for the 'Deployment Aid Report'
+        :param pipeline: publish reports while the model refreshes, rather than waiting for the refresh first. Reports are repointed to the model once it has refreshed, or deleted again if the refresh fails. Not available with ``overwrite_reports``, as overwritten reports could not be restored
+        :param journal_path: path to a journal file recording each completed step, so that a failed deployment can be rerun from where it stopped - steps already completed are checked on the service rather than repeated (defaults to a file in the working directory named after the workspace and model; ``False`` to disable). The journal is removed once the deployment succeeds
         :param kwargs: options passed through to ``on_report_success()`` and ``name_builder()`` functions
 
         .. code-block:: python
@@ -310,74 +392,198 @@ class Workspace:
                 print(f'Report deployed! {report.name}')
         """
 
+        # 0. Check local files before doing anything expensive
+        _check_files(dataset_filepath, report_filepaths, dataset_params)
+        dataset_params = dataset_params or {}
+        if getattr(self, 'from_store', False): # Compare against current content, rather than what the metadata store last saw
+            self.get_datasets()
+            self.get_reports()
+            self.from_store = False
+        dataset_name = name_builder(dataset_filepath, **kwargs)
+        journal = self._open_journal(journal_path, dataset_filepath, dataset_name, report_filepaths, force_refresh, overwrite_reports)
+
         # 1. Get dummy connections string from 'aid report' in config workspace
-        config_workspace = self.tenant.find_workspace(AID_WORKSPACE_NAME)
-        if config_workspace is None:
-            raise SystemExit('ERROR: Cannot find PBI Tools Config workspace')
+        aid = journal.get('aid')
+        if aid: # Connection string is kept in the journal, so there's nothing to check on the service
+            connection_string = base64.b64decode(aid['connection_string'])
+            aid_model = Dataset(None, {'id': aid['aid_model_id'], 'name': AID_MODEL_NAME})
+            print('** Using connection_string from journal')
+        else:
+            config_workspace = self.tenant.find_workspace(AID_WORKSPACE_NAME)
+            if config_workspace is None:
+                raise SystemExit('ERROR: Cannot find PBI Tools Config workspace')
 
-        aid_report = config_workspace.find_report(AID_REPORT_NAME) # Find aid report to get new dataset connection string
-        if aid_report is None:
-            raise SystemExit('ERROR: Cannot find Deployment Aid Report')
+            aid_report = config_workspace.find_report(AID_REPORT_NAME) # Find aid report to get new dataset connection string
+            if aid_report is None:
+                raise SystemExit('ERROR: Cannot find Deployment Aid Report')
 
-        aid_model = config_workspace.find_dataset(AID_MODEL_NAME)
-        if aid_model is None:
-            raise SystemExit('ERROR: Cannot find Deployment Aid Model')
+            aid_model = config_workspace.find_dataset(AID_MODEL_NAME)
+            if aid_model is None:
+                raise SystemExit('ERROR: Cannot find Deployment Aid Model')
 
-        with open(AID_REPORT_NAME, 'wb') as report_file: # Get connection string from aid report
-            report_file.write(aid_report.download())
-        connection_string = get_connection_string(AID_REPORT_NAME)
-        print(f'** Using connection_string from AID_REPORT as [{connection_string}]')
+            with open(AID_REPORT_NAME, 'wb') as report_file: # Get connection string from aid report
+                report_file.write(aid_report.download())
+            connection_string = get_connection_string(AID_REPORT_NAME)
+            print(f'** Using connection_string from AID_REPORT as [{connection_string}]')
+            journal.record('aid', connection_string=base64.b64encode(connection_string).decode('ascii'), aid_model_id=aid_model.id)
 
         # 2. Publish dataset or get existing dataset (if unchanged and current)
-        dataset_name = name_builder(dataset_filepath, **kwargs)
-        matching_datasets = [d for d in self.datasets if name_comparator(d.name, dataset_name, overwrite_reports)] # Look for existing dataset
+        step = journal.get('dataset')
+        dataset = self._get_if_exists(self.get_dataset, step['id']) if step else None # Check it hasn't since been deleted
 
-        if matching_datasets and not force_refresh: # Only publish dataset if it's been updated (or override used):
-            dataset = matching_datasets.pop() # Get the latest dataset
-            print(f'** Using existing dataset [{dataset.name}]')
+        if dataset:
+            matching_datasets = [d for d in self.datasets if d.id in step['old_ids']]
+            print(f'** Using dataset [{dataset.name}] from journal')
         else:
-            print(f'** Publishing dataset [{dataset_filepath}] as [{dataset_name}]...')
-            new_datasets, new_reports = self.publish_file(dataset_filepath, dataset_name, skipReports=True, overwrite_reports=overwrite_reports)
-            dataset = new_datasets.pop()
+            matching_datasets = [d for d in self.datasets if name_comparator(d.name, dataset_name, overwrite_reports)] # Look for existing dataset
+
+            if matching_datasets and not force_refresh: # Only publish dataset if it's been updated (or override used):
+                dataset = matching_datasets.pop() # Get the latest dataset
+                print(f'** Using existing dataset [{dataset.name}]')
+            else:
+                print(f'** Publishing dataset [{dataset_filepath}] as [{dataset_name}]...')
+                new_datasets, new_reports = self.publish_file(dataset_filepath, dataset_name, skipReports=True, overwrite_reports=overwrite_reports)
+                dataset = new_datasets.pop()
+
+            journal.record('dataset', id=dataset.id, old_ids=[d.id for d in matching_datasets])
 
         # 3. Update params and credentials, then refresh (unless current)
-        refresh_state = dataset.get_refresh_state()
+        if pipeline and overwrite_reports:
+            print('! WARNING. Pipelined deploy is not available when overwriting reports, waiting for refresh first')
+            pipeline = False
+
+        refresh_pending = False
+        refresh_state = dataset.get_refresh_state() # Also checks any refresh recorded in the journal
         if refresh_state == 'Completed':
             print('** Existing dataset valid')
         else:
             if refresh_state != 'Unknown': # Unknown == refreshing; therefore either last refresh failed, or there has never been a refresh attempt
                 dataset.take_ownership() # Publishing does not change ownership, so make sure we own it before continuing
 
-                print('*** Updating parameters...')
-                param_keys = [p['name'] for p in dataset.get_params()]
+                param_keys = {p['name']: p.get('currentValue') for p in dataset.get_params()}
                 params = [{'name': k, 'newValue': v} for k, v in dataset_params.items() if k in param_keys] # Only try to update params that are defined for this dataset
-                if params: dataset.update_params({'updateDetails': params})
+                if 'params' in journal and all(param_keys[p['name']] == str(p['newValue']) for p in params):
+                    print('*** Parameters already updated')
+                else:
+                    print('*** Updating parameters...')
+                    if params: dataset.update_params({'updateDetails': params})
+                    journal.record('params')
 
-                print('*** Authenticating...')
+                print('*** Authenticating...') # Always repeated, as tokens from an earlier attempt may have expired
                 dataset.authenticate(credentials)
+                journal.record('auth')
 
                 print('*** Triggering refresh') # We check back later for completion
                 dataset.trigger_refresh()
+                journal.record('refresh')
 
             # 4. Wait for refresh to complete (stop on error)
-            refresh_state = dataset.get_refresh_state(wait=True) # Wait for any dataset refreshes to finish before continuing
-            if refresh_state == 'Completed':
-                print('*** Dataset refreshed') # Don't report completed refresh if we used an existing dataset
+            if pipeline:
+                print('*** Publishing reports while dataset refreshes') # We wait once reports are published (see 6.)
+                refresh_pending = True
             else:
-                raise SystemExit(f'Refresh failed: {refresh_state}')
+                self._wait_for_refresh(dataset)
+                journal.record('refreshed')
 
-        # 5. Publish reports (using dummy connection string initially)
+        # 5. Publish reports (using dummy connection string initially)
+        published = [] # New and old reports, for each report file
+        imports = [] # Report imports (and the old reports they replace) still to finish
+        error = None
         for filepath in report_filepaths: # Import report files
             report_name = name_builder(filepath, **kwargs)
+
+            step = journal.get(f'publish:{filepath}')
+            if step and DeployJournal.hash_file(filepath) not in step.get('hashes', []): # Edited since it was published, so publish again (the earlier copy is deleted with the other old reports)
+                print(f'** Report [{filepath}] has changed since it was published')
+                step = None
+
+            new_reports = self._get_if_exists(lambda ids: [self.get_report(i) for i in ids], step['ids']) if step else None # Check they haven't since been deleted
+            if new_reports:
+                print(f'** Report [{report_name}] already published')
+                published.append((filepath, new_reports, [r for r in self.reports if r.id in step['old_ids']]))
+                continue
+
             matching_reports = [r for r in self.reports if name_comparator(r.name, report_name, overwrite_reports)] # Look for existing reports
             if overwrite_reports:
                 for report in matching_reports: report.repoint(aid_model)
 
             print(f'** Publishing report [{filepath}] as [{report_name}]...') # Alter PBIX file with dummy dataset, in case dataset used during development has since been deleted (we repoint once on service)
+            hashes = [DeployJournal.hash_file(filepath)] # Before and after rebinding, as a rerun finds the file already rebound
             rebind_report(filepath, connection_string)
-            new_datasets, new_reports = self.publish_file(filepath, report_name, overwrite_reports=overwrite_reports)
+            hashes.append(DeployJournal.hash_file(filepath))
+            try:
+                imports.append((filepath, self.start_import(filepath, report_name, overwrite_reports=overwrite_reports), matching_reports, hashes)) # Upload all reports before waiting for any to publish
+            except SystemExit as e:
+                error = e # Still wait for (and record) those already uploaded
+                break
+
+        results = wait_for_imports([i for _, i, _, _ in imports], return_exceptions=True)
+        for (filepath, _, matching_reports, hashes), result in zip(imports, results):
+            if isinstance(result, SystemExit):
+                error = error or result
+                continue
+
+            new_datasets, new_reports = result
+            journal.record(f'publish:{filepath}', ids=[r.id for r in new_reports], old_ids=[r.id for r in matching_reports], hashes=hashes)
+            published.append((filepath, new_reports, matching_reports))
+
+        if error:
+            raise error
+
+        if refresh_pending:
+            try:
+                self._wait_for_refresh(dataset)
+                journal.record('refreshed')
+            except SystemExit:
+                print('** Refresh failed, removing newly published reports')
+                for filepath, new_reports, matching_reports in published:
+                    for report in new_reports: report.delete()
+                    journal.discard(f'publish:{filepath}')
+                raise
+
+        for filepath, new_reports, matching_reports in published:
+            self._complete_reports(dataset, filepath, new_reports, matching_reports, journal, on_report_success, overwrite_reports, **kwargs)
 
-            # 6. Repoint to refreshed model and update Portals (if given)
+        # 8. Delete old models
+        if not overwrite_reports and matching_datasets and 'delete_datasets' not in journal:
+            print(f'** Deleting old datasets {[d.name for d in matching_datasets]}')
+            failed = [r for r in bulk.delete(matching_datasets) if r['status'] == 'Failed']
+            if failed: # Left in the journal as incomplete, so a rerun tries again
+                raise SystemExit(f'ERROR: Failed to delete old datasets {[r["name"] for r in failed]}. {failed[0]["error"]}')
+            journal.record('delete_datasets')
+
+        journal.complete()
+
+    def _open_journal(self, journal_path, dataset_filepath, dataset_name, report_filepaths, force_refresh, overwrite_reports):
+        if journal_path is False:
+            return DeployJournal(None)
+        if journal_path is None:
+            journal_path = re.sub(r'[^\w.-]+', '_', f'.pbi-deploy-{self.id}-{dataset_name}') + '.json'
+
+        model_file = os.stat(dataset_filepath) # A changed model file means a new deployment (report files change as they are rebound, so aren't included)
+        key = DeployJournal.build_key(self.id, dataset_name, model_file.st_size, model_file.st_mtime, report_filepaths, force_refresh, overwrite_reports)
+        return DeployJournal(journal_path, key)
+
+    def _get_if_exists(self, getter, key):
+        try:
+            return getter(key)
+        except RequestError as e:
+            if e.status_code == 404: # Only a missing object means it has been deleted - anything else (e.g. throttling) would otherwise lead to publishing a duplicate
+                return None
+            raise
+
+    def _wait_for_refresh(self, dataset):
+        refresh_state = dataset.get_refresh_state(wait=True) # Wait for any dataset refreshes to finish before continuing
+        if refresh_state == 'Completed':
+            print('*** Dataset refreshed') # Don't report completed refresh if we used an existing dataset
+        else:
+            raise SystemExit(f'Refresh failed: {refresh_state}')
+
+    def _complete_reports(self, dataset, filepath, new_reports, old_reports, journal, on_report_success, overwrite_reports, **kwargs):
+        # 6. Repoint to refreshed model and update Portals (if given)
+        if f'repoint:{filepath}' in journal and all(r.dataset_id == dataset.id for r in new_reports): # Reports resumed from the journal are fetched fresh, so this checks the service
+            print(f'*** Reports for [{filepath}] already repointed')
+        else:
             for report in new_reports:
                 report.repoint(dataset) # Once published, repoint from dummy to new dataset
                 if on_report_success:
@@ -385,16 +591,13 @@ class Workspace:
                         on_report_success(report, **kwargs) # Perform any final post-deploy actions
                     except Exception as e:
                         print(f'! WARNING. Error executing post-deploy steps. {e}')
-                        error = True
-
-            # 7. Delete old reports
-            if not overwrite_reports:
-                for old_report in matching_reports:
-                    print(f'*** Deleting old report [{old_report.name}]')
-                    old_report.delete()
-
-        # 8. Delete old models
-        if not overwrite_reports:
-            for old_dataset in matching_datasets:
-                print(f'** Deleting old dataset [{old_dataset.name}]')
-                old_dataset.delete()
\ No newline at end of file
+            journal.record(f'repoint:{filepath}')
+
+        # 7. Delete old reports
+        if not overwrite_reports and f'delete:{filepath}' not in journal:
+            if old_reports:
+                print(f'*** Deleting old reports {[r.name for r in old_reports]}')
+            failed = [r for r in bulk.delete(old_reports) if r['status'] == 'Failed']
+            if failed: # Left in the journal as incomplete, so a rerun tries again
+                raise SystemExit(f'ERROR: Failed to delete old reports {[r["name"] for r in failed]}. {failed[0]["error"]}')
+            journal.record(f'delete:{filepath}')
@@ -8,6 +8,7 @@ setup(
     description='Power BI REST API wrapper and other tools',
     long_description=open('README.md').read(),
     install_requires=['requests'],
+    entry_points={'console_scripts': ['pbi-tools=pbi.cli:main']},
     url='https://github.com/thomas-daughters/pbi-tools',
     author='Sam Thomas',
     author_email='sam.thomas@redkite.com'
@@ -0,0 +1,80 @@
+"""Stand-ins for service objects, shared by the offline tests (``from conftest import FakeWorkspace``)."""
+
+from datetime import datetime
+
+class FakeToken:
+    def get_headers(self):
+        return {}
+
+class FakeTenant:
+    def __init__(self, store=None):
+        self.token = FakeToken()
+        self.store = store
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.body = body
+        self.text = 'error'
+        self.content = b''
+        self.headers = {}
+        self.url = 'url'
+        self.request = type('Request', (), {'method': 'POST'})
+
+class FakeWorkspace:
+    def __init__(self, name='Sales', capacity_id='capacity', tenant=None, datasets=None, id='workspace'):
+        self.id = id
+        self.name = name
+        self.capacity_id = capacity_id
+        self.tenant = tenant or FakeTenant()
+        self.datasets = datasets or []
+        self.reports = []
+
+    def get_users_access(self):
+        return []
+
+class FakeDataset:
+    """A dataset whose details either fail with ``error`` or come back empty.
+
+    Once triggered, its refresh appears in the history after ``lag`` checks, then runs for ``checks`` checks and finishes with ``result``.
+    """
+
+    def __init__(self, id, name=None, workspace=None, result='Completed', checks=1, lag=0, history=None, log=None, error=None):
+        self.id = id
+        self.name = name or id
+        self.workspace = workspace
+        self.has_rls = False
+        self.result = result
+        self.checks = checks
+        self.lag = lag
+        self.history = history if history is not None else []
+        self.log = log if log is not None else []
+        self.error = error
+        self.refresh = None
+        self.calls = 0
+
+    def get_datasources(self):
+        self.calls += 1
+        if self.error: raise self.error
+        return []
+
+    def get_refresh_history(self, top=None, use_cache=True):
+        self.calls += 1
+        if self.error: raise self.error
+
+        if self.refresh:
+            if self.lag > 0:
+                self.lag -= 1
+            elif self.refresh not in self.history:
+                self.history.insert(0, self.refresh)
+            elif self.checks > 0:
+                self.checks -= 1
+            else:
+                self.refresh['status'] = self.result
+        return self.history[:top]
+
+    def trigger_refresh(self):
+        self.log.append(self.id)
+        self.refresh = {'requestId': f'{self.id}-refresh', 'status': 'Unknown', 'startTime': datetime.utcnow().isoformat()}
+        return self.refresh['requestId']
@@ -0,0 +1,30 @@
+from pbi.cli import ManifestRunner
+
+def _runner(jobs):
+    runner = ManifestRunner.__new__(ManifestRunner) # Without a tenant, as no job reaches the service
+    runner.manifest = {'jobs': jobs}
+    runner.credentials = {}
+    return runner
+
+def test_failed_jobs_dont_stop_the_others(tmp_path):
+    done = []
+    runner = _runner([
+        {'action': 'deploy', 'workspace': 'Sales'}, # No dataset
+        {'action': 'deploy', 'workspace': 'Sales', 'dataset': str(tmp_path / 'missing.pbix')},
+        {'action': 'unknown', 'workspace': 'Sales'},
+        {'action': 'refresh'}, # No workspace
+        {'action': 'refresh', 'workspace': 'Finance'}
+    ])
+    runner.deploy = lambda job: open(job['dataset'], 'rb') # Raises FileNotFoundError, as deploy's file checks would
+    runner.refresh = lambda job: done.append(job['workspace']) or True
+
+    assert runner.run() is False
+    assert done == ['Finance']
+
+def test_stop_on_error():
+    done = []
+    runner = _runner([{'action': 'refresh', 'workspace': 'Sales'}, {'action': 'refresh', 'workspace': 'Finance'}])
+    runner.refresh = lambda job: done.append(job['workspace']) or 1 / 0
+
+    assert runner.run(stop_on_error=True) is False
+    assert done == ['Sales']
@@ -0,0 +1,28 @@
+import requests
+
+from pbi import imports
+from pbi.tools import RequestError
+
+from conftest import FakeResponse, FakeWorkspace
+
+def test_wait_for_imports_rides_out_transient_errors(monkeypatch):
+    polls = {
+        'a': [RequestError('ERROR 429', 429), requests.ConnectionError('reset'), {'importState': 'Succeeded', 'datasets': [], 'reports': [{'id': 'r1', 'name': 'A'}]}],
+        'b': [RequestError('ERROR 403', 403)],
+        'c': [{'importState': 'Publishing'}, {'importState': 'Succeeded', 'datasets': [], 'reports': [{'id': 'r2', 'name': 'C'}]}]
+    }
+
+    def get(url, headers):
+        response = polls[url.rsplit('/', 1)[1]].pop(0)
+        if isinstance(response, BaseException): raise response
+        return FakeResponse(body=response)
+
+    monkeypatch.setattr(imports, 'session', type('Session', (), {'get': staticmethod(get)}))
+    monkeypatch.setattr(imports, 'handle_request', lambda r: r.body)
+    monkeypatch.setattr(imports.time, 'sleep', lambda seconds: None)
+
+    results = imports.wait_for_imports([imports.Import(FakeWorkspace(), i, i.upper()) for i in 'abc'], return_exceptions=True)
+
+    assert results[0][1][0].id == 'r1'
+    assert isinstance(results[1], RequestError) and results[1].status_code == 403
+    assert results[2][1][0].id == 'r2'
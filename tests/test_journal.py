@@ -0,0 +1,49 @@
+import os
+
+from pbi.journal import DeployJournal
+
+def test_resume(tmp_path):
+    filepath = str(tmp_path / 'journal.json')
+    key = DeployJournal.build_key('workspace', 'model.pbix', ['report.pbix'])
+
+    journal = DeployJournal(filepath, key)
+    journal.record('dataset', id='1234', old_ids=[])
+    journal.record('refresh')
+
+    resumed = DeployJournal(filepath, key)
+    assert 'refresh' in resumed and 'refreshed' not in resumed
+    assert resumed.get('dataset') == {'id': '1234', 'old_ids': []}
+    assert not os.path.exists(filepath + '.tmp')
+
+def test_different_deployment_is_ignored(tmp_path):
+    filepath = str(tmp_path / 'journal.json')
+    DeployJournal(filepath, DeployJournal.build_key('a')).record('refresh')
+
+    journal = DeployJournal(filepath, DeployJournal.build_key('b'))
+    assert 'refresh' not in journal
+
+def test_discard_and_complete(tmp_path):
+    filepath = str(tmp_path / 'journal.json')
+    journal = DeployJournal(filepath, 'key')
+    journal.record('publish:report.pbix', ids=['1'])
+    journal.discard('publish:report.pbix')
+
+    assert 'publish:report.pbix' not in DeployJournal(filepath, 'key')
+
+    journal.complete()
+    assert not os.path.exists(filepath)
+
+def test_in_memory():
+    journal = DeployJournal(None)
+    journal.record('refresh')
+    assert 'refresh' in journal
+    journal.complete()
+
+def test_hash_file(tmp_path):
+    filepath = tmp_path / 'report.pbix'
+    filepath.write_bytes(b'original')
+    original = DeployJournal.hash_file(str(filepath))
+
+    assert DeployJournal.hash_file(str(filepath)) == original
+    filepath.write_bytes(b'edited')
+    assert DeployJournal.hash_file(str(filepath)) != original
@@ -0,0 +1,25 @@
+import os
+import shutil
+
+from pbi.pbix import PbixFile
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+def test_summary():
+    with PbixFile(os.path.join(DATA, 'Deployment Aid Model.pbix')) as pbix:
+        summary = pbix.summary()
+
+    assert summary['has_embedded_model']
+    assert summary['parameters'] is None # Queries are inside the compressed model, so can't be read
+
+def test_scan_carries_on_past_unreadable_files(tmp_path):
+    shutil.copy(os.path.join(DATA, 'Deployment Aid Report.pbix'), tmp_path / 'a.pbix')
+    (tmp_path / 'b.pbix').write_bytes(b'not a zip file')
+    (tmp_path / 'c.pbix').write_bytes(b'')
+    (tmp_path / 'notes.txt').write_text('ignored')
+
+    summaries = list(PbixFile.scan(str(tmp_path)))
+
+    assert [os.path.basename(s['filepath']) for s in summaries] == ['a.pbix', 'b.pbix', 'c.pbix']
+    assert 'error' not in summaries[0]
+    assert all('error' in s for s in summaries[1:])
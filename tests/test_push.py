@@ -0,0 +1,86 @@
+import json
+import time
+import threading
+from datetime import datetime
+
+import pytest
+
+from pbi import push
+
+from conftest import FakeResponse, FakeWorkspace
+
+def _decode(payloads):
+    return [(count, json.loads(body)['rows']) for count, body in payloads]
+
+def test_dumps():
+    body = push.dumps([{'time': datetime(2024, 1, 2, 3, 4, 5), 'value': 1.5, 'name': 'a'}])
+    assert json.loads(body) == {'rows': [{'time': '2024-01-02T03:04:05', 'value': 1.5, 'name': 'a'}]}
+
+def test_batches_of_dictionaries():
+    rows = ({'id': i} for i in range(25))
+    payloads = _decode(push.iter_payloads(rows, batch_size=10))
+
+    assert [count for count, _ in payloads] == [10, 10, 5]
+    assert [r['id'] for _, batch in payloads for r in batch] == list(range(25))
+
+def test_batches_of_sequences():
+    payloads = _decode(push.iter_payloads([(1, 'a'), (2, 'b')], columns=['id', 'name']))
+    assert payloads == [(2, [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}])]
+
+def test_batch_size_is_capped():
+    payloads = list(push.iter_payloads([{'id': i} for i in range(push.MAX_ROWS_PER_REQUEST + 1)], batch_size=10 ** 6))
+    assert [count for count, _ in payloads] == [push.MAX_ROWS_PER_REQUEST, 1]
+
+def test_numpy_arrays():
+    np = pytest.importorskip('numpy')
+
+    structured = np.array([(1, 2.5), (2, 3.5)], dtype=[('id', 'i8'), ('value', 'f8')])
+    assert _decode(push.iter_payloads(structured)) == [(2, [{'id': 1, 'value': 2.5}, {'id': 2, 'value': 3.5}])]
+
+    plain = np.arange(6).reshape(3, 2)
+    assert _decode(push.iter_payloads(plain, batch_size=2, columns=['a', 'b'])) == [(2, [{'a': 0, 'b': 1}, {'a': 2, 'b': 3}]), (1, [{'a': 4, 'b': 5}])]
+
+    with pytest.raises(SystemExit):
+        list(push.iter_payloads(plain))
+
+def test_dataframe():
+    pd = pytest.importorskip('pandas')
+
+    df = pd.DataFrame({'id': [1, 2, 3], 'name': ['a', 'b', 'c']})
+    assert _decode(push.iter_payloads(df, batch_size=2)) == [(2, [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}]), (1, [{'id': 3, 'name': 'c'}])]
+
+def test_rate_limiter_spaces_calls_across_threads():
+    limiter = push.RateLimiter(per_minute=3000) # One call every 0.02 seconds
+    times = []
+    lock = threading.Lock()
+
+    def call():
+        limiter.wait()
+        with lock:
+            times.append(time.monotonic())
+
+    threads = [threading.Thread(target=call) for _ in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    times.sort()
+    assert times[-1] - times[0] >= 5 * 0.02 * 0.9 # Allow for timer resolution
+
+def test_add_rows_retries_connection_errors_and_records_progress(monkeypatch):
+    import requests
+    from pbi import dataset as dataset_module
+
+    responses = [requests.ConnectionError('reset'), FakeResponse(200), FakeResponse(200), FakeResponse(400)]
+    def post(url, data, headers):
+        response = responses.pop(0) if responses else FakeResponse(200)
+        if isinstance(response, Exception): raise response
+        return response
+
+    monkeypatch.setattr(dataset_module, 'session', type('Session', (), {'post': staticmethod(post)}))
+    monkeypatch.setattr(dataset_module.time, 'sleep', lambda seconds: None)
+    dataset = dataset_module.Dataset(FakeWorkspace(), {'id': 'dataset', 'name': 'Metrics'})
+
+    with pytest.raises(SystemExit):
+        dataset.add_rows('Readings', [{'id': i} for i in range(50)], batch_size=10, max_workers=1, max_requests_per_minute=60000)
+
+    assert dataset.ingestion_stats['rows'] == 20 and dataset.ingestion_stats['failed_rows'] == 10
@@ -0,0 +1,61 @@
+import json
+import pytest
+
+from pbi import query
+
+RESULT = {'results': [{'tables': [
+    {'rows': [{'[a]': 1, '[b]': 'x'}, {'[a]': 2, '[b]': 'y, "z" ]'}, {'[a]': 3, '[b]': None}]},
+    {'rows': [{'[c]': 4.5}]}
+]}]}
+
+def _chunks(text, size):
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def _rows(body):
+    return [r for t in body['results'][0]['tables'] for r in t['rows']]
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 1000])
+def test_rows_split_across_chunks(size):
+    text = json.dumps(RESULT)
+    assert list(query.iter_rows(_chunks(text, size))) == _rows(RESULT)
+
+def test_large_result():
+    rows = [{'[id]': i, '[text]': 'x' * 50} for i in range(5000)] # Larger than READ_CHUNK_SIZE, so decoded rows are dropped from the buffer
+    body = {'results': [{'tables': [{'rows': rows}]}]}
+    assert list(query.iter_rows(_chunks(json.dumps(body), 4096))) == rows
+
+def test_multibyte_characters_split_across_chunks():
+    body = {'results': [{'tables': [{'rows': [{'[name]': 'Zürich – 東京'}]}]}]}
+    text = '﻿' + json.dumps(body, ensure_ascii=False) # Power BI sends a byte order mark
+    assert list(query.iter_rows(_chunks(text, 1))) == _rows(body)
+
+def test_empty_table():
+    body = {'results': [{'tables': [{'rows': []}]}]}
+    assert list(query.iter_rows(_chunks(json.dumps(body), 5))) == []
+
+def test_error_response():
+    body = {'error': {'code': 'DatasetExecuteQueriesError', 'message': 'Query (1, 10) Cannot find table'}}
+    with pytest.raises(SystemExit, match='Query failed'):
+        list(query.iter_rows(_chunks(json.dumps(body), 4)))
+
+def test_error_in_result():
+    body = {'results': [{'error': {'code': 'QueryError', 'message': 'bad'}}]}
+    with pytest.raises(SystemExit, match='Query failed'):
+        list(query.iter_rows(_chunks(json.dumps(body), 4)))
+
+def test_truncated_response():
+    text = json.dumps(RESULT)
+    with pytest.raises(SystemExit, match='ended unexpectedly'):
+        list(query.iter_rows(_chunks(text[:len(text) // 2], 8)))
+
+def test_unexpected_response():
+    with pytest.raises(SystemExit, match='Unexpected query response'):
+        list(query.iter_rows([b'<html>Service unavailable</html>']))
+
+def test_batches_and_collect():
+    rows = [{'a': i, 'b': str(i)} for i in range(5)]
+    batches = list(query.iter_batches(rows, batch_size=2))
+
+    assert [len(b['a']) for b in batches] == [2, 2, 1]
+    assert query.collect(batches) == {'a': [0, 1, 2, 3, 4], 'b': ['0', '1', '2', '3', '4']}
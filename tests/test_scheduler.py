@@ -0,0 +1,73 @@
+from pbi.scheduler import RefreshScheduler
+
+from conftest import FakeWorkspace, FakeDataset
+
+def test_same_name_in_different_workspaces():
+    scheduler = RefreshScheduler(interval=0)
+    dev = scheduler.add(FakeDataset('1', 'Sales', FakeWorkspace('Dev')))
+    prod = scheduler.add(FakeDataset('2', 'Sales', FakeWorkspace('Prod')))
+    results = scheduler.run()
+
+    assert len(results) == 2
+    assert results[dev.id]['workspace'] == 'Dev' and results[prod.id]['workspace'] == 'Prod'
+    assert all(r['status'] == 'Completed' for r in results.values())
+
+def test_priority_and_capacity_limit():
+    log = []
+    scheduler = RefreshScheduler(max_concurrent=1, interval=0)
+    workspace = FakeWorkspace('Finance')
+    scheduler.add(FakeDataset('low', 'Low', workspace, log=log), priority=0)
+    scheduler.add(FakeDataset('high', 'High', workspace, log=log), priority=10)
+    scheduler.add(FakeDataset('other', 'Other', FakeWorkspace('Sales', 'other capacity'), log=log), priority=0)
+    scheduler.run()
+
+    assert log == ['high', 'other', 'low'] # One at a time on the shared capacity, highest priority first
+
+def test_dependencies():
+    log = []
+    scheduler = RefreshScheduler(interval=0)
+    workspace = FakeWorkspace('Finance')
+    staging = scheduler.add(FakeDataset('staging', 'Staging', workspace, checks=3, log=log))
+    scheduler.add(FakeDataset('sales', 'Sales', workspace, log=log), priority=10, depends_on=[staging])
+    results = scheduler.run()
+
+    assert log == ['staging', 'sales']
+    assert results['sales']['status'] == 'Completed'
+
+def test_failed_dependency_skips_downstream():
+    scheduler = RefreshScheduler(interval=0)
+    workspace = FakeWorkspace('Finance')
+    staging = scheduler.add(FakeDataset('staging', 'Staging', workspace, result='Failed'))
+    sales = scheduler.add(FakeDataset('sales', 'Sales', workspace), depends_on=[staging])
+    scheduler.add(FakeDataset('report', 'Report', workspace), depends_on=[sales])
+    results = scheduler.run()
+
+    assert [results[i]['status'] for i in ['staging', 'sales', 'report']] == ['Failed', 'Skipped', 'Skipped']
+
+def test_circular_dependencies_are_skipped():
+    scheduler = RefreshScheduler(interval=0)
+    workspace = FakeWorkspace('Finance')
+    a = FakeDataset('a', 'A', workspace)
+    b = FakeDataset('b', 'B', workspace)
+    scheduler.add(a, depends_on=[b])
+    scheduler.add(b, depends_on=[a])
+    results = scheduler.run()
+
+    assert [r['status'] for r in results.values()] == ['Skipped', 'Skipped']
+
+def test_never_refreshed_dataset():
+    scheduler = RefreshScheduler(interval=0)
+    dataset = scheduler.add(FakeDataset('new', 'New', FakeWorkspace('Finance'), lag=2)) # No history at all until the refresh is listed
+    assert scheduler.run()[dataset.id]['status'] == 'Completed'
+
+def test_previous_refresh_is_not_mistaken_for_the_new_one():
+    log = []
+    previous = [{'requestId': 'old', 'status': 'Completed', 'startTime': '2020-01-01T00:00:00Z'}]
+    scheduler = RefreshScheduler(interval=0)
+    workspace = FakeWorkspace('Finance')
+    staging = scheduler.add(FakeDataset('staging', 'Staging', workspace, lag=3, history=previous, result='Failed', log=log))
+    scheduler.add(FakeDataset('sales', 'Sales', workspace, log=log), depends_on=[staging])
+    results = scheduler.run()
+
+    assert log == ['staging'] # Sales never started from the stale Completed entry
+    assert results['staging']['status'] == 'Failed' and results['sales']['status'] == 'Skipped'
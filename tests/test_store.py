@@ -0,0 +1,34 @@
+from pbi.store import MetadataStore
+from pbi.tools import RequestError
+
+from conftest import FakeTenant, FakeWorkspace, FakeDataset
+
+def test_details_only_fetched_once_while_current():
+    store = MetadataStore(':memory:')
+    datasets = [FakeDataset('model'), FakeDataset('push', error=RequestError('ERROR 404: Not found', 404))]
+    workspace = FakeWorkspace(tenant=FakeTenant(store), datasets=datasets)
+
+    store.sync_workspace(workspace)
+    store.sync_workspace(workspace)
+
+    assert [d.calls for d in datasets] == [2, 2] # Data sources and refreshes, fetched once each - even with nothing to store
+
+def test_transient_errors_are_retried():
+    store = MetadataStore(':memory:')
+    dataset = FakeDataset('model', error=RequestError('ERROR 429: Too many requests', 429))
+    workspace = FakeWorkspace(tenant=FakeTenant(store), datasets=[dataset])
+
+    store.sync_workspace(workspace)
+    store.sync_workspace(workspace)
+
+    assert dataset.calls == 4
+
+def test_invalidated_workspace_is_not_loaded():
+    store = MetadataStore(':memory:')
+    tenant = FakeTenant(store)
+    store.save_workspace(FakeWorkspace(tenant=tenant, datasets=[FakeDataset('model')]))
+
+    assert store.load_workspace(FakeWorkspace(tenant=tenant))
+
+    store.invalidate_workspace('workspace')
+    assert not store.load_workspace(FakeWorkspace(tenant=tenant))